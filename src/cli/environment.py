@@ -1,17 +1,50 @@
+import functools
 import importlib
+import importlib.metadata
+import importlib.util
 import json
 import os
 import shutil
 import subprocess
 import sys
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Tuple
 from typing import Optional
 
 from src.utils.logging import get_logger
 
+# orjson parses straight from bytes and is several times faster than the
+# stdlib for the repeated small-config reads the wizard does; fall back
+# transparently when it is not installed.
+try:
+    import orjson as _json
+except ImportError:
+    _json = json
+
+# ijson lets us pull just the env/stack sub-sections out of a large config
+# without materializing the whole document. Only worth it past a size
+# threshold; small files parse faster in one shot.
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+_IJSON_MIN_BYTES = 10 * 1024
+
 LOGGER = get_logger("ENV")
 
+# Environment for short-lived helper subprocesses: skip .pyc writing and
+# pip's version-check round-trip, and never block on interactive prompts.
+_SUBPROC_ENV = {
+    **os.environ,
+    "PYTHONDONTWRITEBYTECODE": "1",
+    "PIP_DISABLE_PIP_VERSION_CHECK": "1",
+    "PIP_NO_INPUT": "1",
+}
+
 MODULE_NAME_OVERRIDES: Dict[str, str] = {
     "opencv-python": "cv2",
     "PyYAML": "yaml",
@@ -24,12 +57,18 @@ MODULE_NAME_OVERRIDES: Dict[str, str] = {
 # Internal paths
 # ---------------------------------------------------------------------------
 
+# Resolved once at import time; every helper below would otherwise re-stat
+# the same path components via Path(__file__).resolve().
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+_CONFIG_PATH = _PROJECT_ROOT / "config.json"
+
+
 def _project_root() -> Path:
-    return Path(__file__).resolve().parents[2]
+    return _PROJECT_ROOT
 
 
 def _config_path() -> Path:
-    return _project_root() / "config.json"
+    return _CONFIG_PATH
 
 
 def _host_python() -> Path:
@@ -58,14 +97,36 @@ def _host_python() -> Path:
 # env.dependencies take precedence over stack pins.
 # ---------------------------------------------------------------------------
 
-def _load_env_config() -> Tuple[Dict[str, str], Dict[str, str]]:
-    cfg_path = _config_path()
-    if not cfg_path.is_file():
-        LOGGER.error("config.json missing at %s", cfg_path)
-        return {}, {}
+def _load_streamed_config(cfg_path: Path) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Stream only the sub-sections the wizard needs out of a large config."""
+    python_cfg: Dict[str, str] = {}
+    deps_env: Dict[str, str] = {}
+    deps_stack: Dict[str, str] = {}
+
+    with cfg_path.open("rb") as f:
+        for key, value in ijson.kvitems(f, "env"):
+            if key == "python":
+                python_cfg = value or {}
+            elif key == "dependencies":
+                deps_env = value or {}
+        f.seek(0)
+        for key, value in ijson.kvitems(f, "stack.versions.python_packages"):
+            deps_stack[key] = value
 
-    with cfg_path.open("r", encoding="utf-8") as f:
-        cfg = json.load(f)
+    return python_cfg, {**deps_stack, **deps_env}
+
+
+@functools.lru_cache(maxsize=1)
+def _load_cached_config(cfg_path: Path, mtime_ns: int) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Parse config.json once per on-disk version.
+
+    Keyed on mtime so the wizard's repeated calls (check, requirements write,
+    venv setup) reuse one parse, while edits to config.json still invalidate.
+    """
+    if ijson is not None and cfg_path.stat().st_size >= _IJSON_MIN_BYTES:
+        return _load_streamed_config(cfg_path)
+
+    cfg = _json.loads(cfg_path.read_bytes())
 
     env_cfg = cfg.get("env", {}) or {}
     deps_env = env_cfg.get("dependencies", {}) or {}
@@ -79,10 +140,20 @@ def _load_env_config() -> Tuple[Dict[str, str], Dict[str, str]]:
     return env_cfg.get("python", {}) or {}, merged_deps
 
 
+def _load_env_config() -> Tuple[Dict[str, str], Dict[str, str]]:
+    cfg_path = _config_path()
+    if not cfg_path.is_file():
+        LOGGER.error("config.json missing at %s", cfg_path)
+        return {}, {}
+
+    return _load_cached_config(cfg_path, cfg_path.stat().st_mtime_ns)
+
+
 # ---------------------------------------------------------------------------
 # Version checks
 # ---------------------------------------------------------------------------
 
+@functools.lru_cache(maxsize=8)
 def _parse_version(v: Optional[str]):
     if not v:
         return None
@@ -95,17 +166,22 @@ def _parse_version(v: Optional[str]):
         return None
 
 
+def _pack_version(major: int, minor: int) -> int:
+    # sys.hexversion-style packing: one int comparison per bound.
+    return (major << 8) | minor
+
+
 def _check_python_version(python_cfg: Dict[str, str]) -> Tuple[bool, str]:
     major, minor = sys.version_info[:2]
-    current = (major, minor)
+    cur_packed = _pack_version(major, minor)
     cur_str = f"{major}.{minor}"
 
     min_v = _parse_version(python_cfg.get("min"))
     max_v = _parse_version(python_cfg.get("max"))
 
-    if min_v and current < min_v:
+    if min_v and cur_packed < _pack_version(*min_v):
         return False, f"Python {cur_str} < min required {min_v[0]}.{min_v[1]}"
-    if max_v and current > max_v:
+    if max_v and cur_packed > _pack_version(*max_v):
         return False, f"Python {cur_str} > supported max {max_v[0]}.{max_v[1]}"
 
     return True, f"Python {cur_str} OK"
@@ -117,12 +193,14 @@ def _check_python_version(python_cfg: Dict[str, str]) -> Tuple[bool, str]:
 
 def _write_requirements(deps: Dict[str, str]) -> Path:
     path = _project_root() / "requirements.txt"
-    with path.open("w", encoding="utf-8") as f:
-        for pkg, ver in deps.items():
-            if ver:
-                f.write(f"{pkg}=={ver}\n")
-            else:
-                f.write(f"{pkg}\n")
+    content = "".join(
+        f"{pkg}=={ver}\n" if ver else f"{pkg}\n" for pkg, ver in deps.items()
+    )
+    # Single buffered write via a temp file + rename: one syscall for the
+    # payload and concurrent readers never observe a half-written file.
+    tmp = path.with_suffix(".txt.tmp")
+    tmp.write_text(content, encoding="utf-8")
+    os.replace(tmp, path)
     LOGGER.info("requirements.txt written to %s", path)
     return path
 
@@ -153,6 +231,50 @@ def _torch_extra_index(deps: Dict[str, str]) -> Optional[str]:
 # Create .venv using the host interpreter
 # ---------------------------------------------------------------------------
 
+# One scandir of the parent replaces the repeated exists/is_file stat calls
+# the setup path makes against the same few entries.
+_DIR_CACHE: Dict[str, Dict[str, os.stat_result]] = {}
+
+
+def _stat_cached(path: Path) -> Optional[os.stat_result]:
+    parent = str(path.parent)
+    entries = _DIR_CACHE.get(parent)
+    if entries is None:
+        entries = {}
+        try:
+            with os.scandir(parent) as it:
+                for entry in it:
+                    try:
+                        entries[entry.name] = entry.stat()
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        _DIR_CACHE[parent] = entries
+    return entries.get(path.name)
+
+
+def _invalidate_stat_cache() -> None:
+    _DIR_CACHE.clear()
+
+
+def _prewarm_indexes() -> None:
+    """Best-effort DNS/TLS warmup of the package indexes hit at install time.
+
+    Runs concurrently with venv creation; failures are ignored since pip/uv
+    will surface real connectivity problems themselves.
+    """
+    import urllib.request
+
+    for url in ("https://pypi.org/simple/", "https://download.pytorch.org/whl/cpu/"):
+        try:
+            urllib.request.urlopen(
+                urllib.request.Request(url, method="HEAD"), timeout=5
+            ).close()
+        except Exception:
+            pass
+
+
 def _setup_venv() -> Optional[Path]:
     root = _project_root()
     venv_dir = root / ".venv"
@@ -162,10 +284,21 @@ def _setup_venv() -> Optional[Path]:
     current_prefix = Path(sys.prefix).resolve()
     if inside and current_prefix == venv_dir.resolve():
         LOGGER.warning("Active venv detected; skipping rebuild.")
-        return _venv_python() if _venv_python().exists() else None
-
-    if venv_dir.exists():
-        shutil.rmtree(venv_dir)
+        vp = _venv_python()
+        return vp if _stat_cached(vp) is not None else None
+
+    if _stat_cached(venv_dir) is not None:
+        # A populated site-packages holds tens of thousands of files; the
+        # coreutils unlinkat path is much faster than Python's per-file
+        # remove loop. Fall back to shutil.rmtree off POSIX or on failure.
+        if os.name != "nt":
+            try:
+                subprocess.run(["rm", "-rf", str(venv_dir)], check=True)
+            except (OSError, subprocess.CalledProcessError):
+                shutil.rmtree(venv_dir, ignore_errors=True)
+        else:
+            shutil.rmtree(venv_dir, ignore_errors=True)
+        _invalidate_stat_cache()
         LOGGER.info("Removed old .venv")
 
     # Build using the host/base interpreter (not the current venv)
@@ -173,11 +306,13 @@ def _setup_venv() -> Optional[Path]:
     builder = base_python if base_python.exists() else Path(sys.executable)
 
     try:
-        subprocess.run([str(builder), "-m", "venv", str(venv_dir)], check=True)
+        subprocess.run([str(builder), "-m", "venv", str(venv_dir)], check=True, env=_SUBPROC_ENV)
     except subprocess.CalledProcessError as e:
         LOGGER.error("Could not create .venv: %s", e)
         return None
 
+    _invalidate_stat_cache()
+    _invalidate_check_cache()
     return _venv_python()
 
 
@@ -185,13 +320,109 @@ def _setup_venv() -> Optional[Path]:
 # Install deps inside venv
 # ---------------------------------------------------------------------------
 
+_WHEELHOUSE = _PROJECT_ROOT / ".wheelcache"
+
+
+def _wheelhouse_fresh(req_path: Path) -> bool:
+    """True when the wheelhouse was populated after the last requirements edit."""
+    try:
+        stamp = (_WHEELHOUSE / ".stamp").stat().st_mtime_ns
+        return stamp >= req_path.stat().st_mtime_ns
+    except OSError:
+        return False
+
+
+# Tiny stdin-driven pip driver: runs successive pip commands in one
+# interpreter so each extra command skips python + pip startup.
+_PIP_DRIVER = (
+    "import json, sys\n"
+    "from pip._internal.cli.main import main\n"
+    "rc = 0\n"
+    "for line in sys.stdin:\n"
+    "    line = line.strip()\n"
+    "    if not line:\n"
+    "        continue\n"
+    "    rc = main(json.loads(line)) or 0\n"
+    "    if rc:\n"
+    "        break\n"
+    "sys.exit(rc)\n"
+)
+
+
+def _run_pip_batch(python_exec: Path, commands: List[List[str]]) -> None:
+    """Feed several pip argv lists through a single long-lived pip process."""
+    proc = subprocess.Popen(
+        [str(python_exec), "-c", _PIP_DRIVER],
+        stdin=subprocess.PIPE,
+        text=True,
+        env=_SUBPROC_ENV,
+    )
+    payload = "".join(json.dumps(cmd) + "\n" for cmd in commands)
+    proc.communicate(payload)
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, "pip batch")
+
+
+def _install_from_wheelhouse(python_exec: Path, req_path: Path) -> bool:
+    """Install pinned requirements from the local wheelhouse, no index round-trips.
+
+    The wheelhouse is refreshed with `pip download` only when requirements.txt
+    changed; repeat setups then install purely from disk.
+    """
+    commands: List[List[str]] = []
+    refresh = not _wheelhouse_fresh(req_path)
+    if refresh:
+        commands.append([
+            "download",
+            "--index-url", "https://download.pytorch.org/whl/cpu",
+            "--extra-index-url", "https://pypi.org/simple",
+            "-d", str(_WHEELHOUSE),
+            "-r", str(req_path),
+        ])
+
+    commands.append([
+        "install",
+        "--no-index", "--find-links", str(_WHEELHOUSE),
+        "-r", str(req_path),
+    ])
+
+    _run_pip_batch(python_exec, commands)
+    if refresh:
+        (_WHEELHOUSE / ".stamp").touch()
+    return True
+
+
 def _install_requirements(python_exec: Path, req_path: Path, extra_index_url: Optional[str] = None):
+    _invalidate_check_cache()
     try:
-        subprocess.run([str(python_exec), "-m", "pip", "install", "--upgrade", "pip"], check=True)
+        uv_path = shutil.which("uv")
+        if uv_path is not None:
+            # uv resolves and installs in parallel and ships its own resolver,
+            # so the pip self-upgrade step is unnecessary on this path.
+            cmd = [
+                uv_path, "pip", "install",
+                "--python", str(python_exec),
+                "--index-url", "https://download.pytorch.org/whl/cpu",
+                "--extra-index-url", "https://pypi.org/simple",
+                "-r", str(req_path),
+            ]
+            subprocess.run(cmd, check=True, env=_SUBPROC_ENV)
+            return True
+
+        # Wheelhouse path: deps are pinned, so repeat setups can install
+        # from the local cache without touching either index.
+        try:
+            return _install_from_wheelhouse(python_exec, req_path)
+        except subprocess.CalledProcessError as e:
+            LOGGER.warning("Wheelhouse install failed (%s); falling back to index install.", e)
 
+        # Fallback: classic pip path. The pip self-upgrade is folded into the
+        # same invocation so only one pip process pays interpreter startup
+        # and resolver warmup.
         cmd = [
             str(python_exec), "-m", "pip", "install",
             "--no-cache-dir",
+            "--upgrade", "pip",
             "--index-url", "https://download.pytorch.org/whl/cpu",
             "--extra-index-url", "https://pypi.org/simple",
             "-r", str(req_path)
@@ -203,7 +434,7 @@ def _install_requirements(python_exec: Path, req_path: Path, extra_index_url: Op
         # if extra_index_url:
         #     cmd += ["--extra-index-url", extra_index_url]
 
-        subprocess.run(cmd, check=True)
+        subprocess.run(cmd, check=True, env=_SUBPROC_ENV)
     except subprocess.CalledProcessError as e:
         LOGGER.error("Failed pip install: %s", e)
         print("Failed to install dependencies.")
@@ -215,6 +446,7 @@ def _install_requirements(python_exec: Path, req_path: Path, extra_index_url: Op
 # Module import checks
 # ---------------------------------------------------------------------------
 
+@functools.lru_cache(maxsize=256)
 def _map_pkg(pkg: str) -> str:
     return MODULE_NAME_OVERRIDES.get(pkg, pkg.replace("-", "_"))
 
@@ -244,56 +476,149 @@ def _patch_torchvision_alias() -> None:
     sys.modules["torchvision.transforms.functional_tensor"] = impl
 
 
-def _check_imports(deps: Dict[str, str]) -> Tuple[bool, List[str]]:
+def _try_import(mod: str, deep: bool = False) -> Optional[Exception]:
+    try:
+        if deep:
+            importlib.import_module(mod)
+        elif importlib.util.find_spec(mod) is None:
+            return ModuleNotFoundError(f"No module named '{mod}'")
+        return None
+    except Exception as e:
+        return e
+
+
+def _check_imports(deps: Dict[str, str], deep: bool = False) -> Tuple[bool, List[Tuple[int, str]]]:
+    """Verify each configured dependency is importable.
+
+    The default shallow mode locates modules with importlib.util.find_spec
+    without executing them, so a healthy environment is confirmed in
+    milliseconds instead of paying torch/cv2 initialization. deep=True runs
+    the real imports, catching broken shared-library installs.
+    """
     _patch_torchvision_alias()
-    msgs = []
+    modules = [_map_pkg(pkg) for pkg in deps.keys()]
+    if not modules:
+        return True, []
+
+    # Deep imports of heavy C-extension packages (torch, cv2, skimage) spend
+    # most of their time in disk I/O and dlopen, which release the GIL, so
+    # probing them concurrently collapses wallclock from sum-of-imports to
+    # roughly max-of-imports. executor.map preserves input order.
+    with ThreadPoolExecutor(max_workers=min(8, len(modules))) as ex:
+        errors = list(ex.map(functools.partial(_try_import, deep=deep), modules))
+
+    msgs: List[Tuple[int, str]] = []
     ok = True
-    for pkg in deps.keys():
-        mod = _map_pkg(pkg)
-        try:
-            importlib.import_module(mod)
-            msgs.append(f"OK - import {mod}")
-        except Exception as e:
+    for mod, err in zip(modules, errors):
+        if err is None:
+            msgs.append((logging.INFO, f"import {mod}"))
+        else:
             ok = False
-            msgs.append(f"FAIL - import {mod}: {e}")
+            msgs.append((logging.ERROR, f"import {mod}: {err}"))
     return ok, msgs
 
 
-def _check_cuda() -> Tuple[bool, List[str]]:
-    msgs = []
+def _cuda_available_fast() -> Tuple[bool, int]:
+    """Probe CUDA through the driver library directly via ctypes.
+
+    Avoids importing torch (seconds of shared-library loading and a large
+    RSS spike) just to answer a boolean. Returns (available, device_count).
+    """
+    import ctypes
+
+    lib_names = ("nvcuda.dll",) if os.name == "nt" else ("libcuda.so.1", "libcuda.so")
+    for name in lib_names:
+        try:
+            lib = ctypes.CDLL(name)
+        except OSError:
+            continue
+        try:
+            if lib.cuInit(0) != 0:
+                return False, 0
+            count = ctypes.c_int(0)
+            if lib.cuDeviceGetCount(ctypes.byref(count)) != 0:
+                return False, 0
+            return count.value > 0, count.value
+        except Exception:
+            return False, 0
+    return False, 0
+
+
+def _check_cuda() -> Tuple[bool, List[Tuple[int, str]]]:
+    msgs: List[Tuple[int, str]] = []
     try:
-        import torch
-        msgs.append(f"OK - torch {torch.__version__}")
-        if torch.cuda.is_available():
-            msgs.append(f"OK - CUDA available ({torch.cuda.device_count()} GPU(s))")
+        if "torch" in sys.modules:
+            torch_version = sys.modules["torch"].__version__
         else:
-            msgs.append("WARN - CUDA not available (CPU mode)")
-        return True, msgs
+            # Read the installed version from package metadata instead of
+            # paying the full `import torch` cost.
+            torch_version = importlib.metadata.version("torch")
+        msgs.append((logging.INFO, f"torch {torch_version}"))
     except Exception as e:
-        return False, [f"FAIL - torch/CUDA: {e}"]
+        return False, [(logging.ERROR, f"torch/CUDA: {e}")]
+
+    available, count = _cuda_available_fast()
+    if available:
+        msgs.append((logging.INFO, f"CUDA available ({count} GPU(s))"))
+    else:
+        msgs.append((logging.WARNING, "CUDA not available (CPU mode)"))
+    return True, msgs
+
+
+# Level -> printable tag; checks carry levels as ints so rendering is a
+# single dict lookup instead of per-line prefix comparisons.
+_LEVEL_TAGS = {logging.INFO: "OK", logging.WARNING: "WARN", logging.ERROR: "FAIL"}
+
+
+def _render_results(results: List[Tuple[int, str]]) -> List[str]:
+    return [f"{_LEVEL_TAGS[lvl]} - {msg}" for lvl, msg in results]
 
 
 # ---------------------------------------------------------------------------
 # Environment check
 # ---------------------------------------------------------------------------
 
+# Cache-aside for check_environment: re-entering the wizard after a no-op
+# action should not re-probe every import and CUDA again.
+_CHECK_CACHE_TTL_S = 30.0
+_check_cache: Optional[Tuple[float, int, Tuple[bool, List[str]]]] = None
+
+
+def _invalidate_check_cache() -> None:
+    global _check_cache
+    _check_cache = None
+
+
 def check_environment() -> Tuple[bool, List[str]]:
+    global _check_cache
+
+    try:
+        cfg_mtime = _config_path().stat().st_mtime_ns
+    except OSError:
+        cfg_mtime = -1
+
+    if _check_cache is not None:
+        ts, cached_mtime, result = _check_cache
+        if cached_mtime == cfg_mtime and time.monotonic() - ts < _CHECK_CACHE_TTL_S:
+            return result
+
     lines = [f"Python {sys.version_info[0]}.{sys.version_info[1]} OK",
              f"Interpreter: {sys.executable}"]
 
     py_cfg, deps = _load_env_config()
 
     ok_py, msg_py = _check_python_version(py_cfg)
-    (LOGGER.info if ok_py else LOGGER.error)(msg_py)
+    LOGGER.log(logging.INFO if ok_py else logging.ERROR, msg_py)
 
-    ok_mod, mod_lines = _check_imports(deps)
-    lines.extend(mod_lines)
+    ok_mod, mod_results = _check_imports(deps)
+    lines.extend(_render_results(mod_results))
 
-    ok_cuda, cuda_lines = _check_cuda()
-    lines.extend(cuda_lines)
+    ok_cuda, cuda_results = _check_cuda()
+    lines.extend(_render_results(cuda_results))
 
     ok = ok_py and ok_mod and ok_cuda
     lines.append("Environment check PASSED." if ok else "Environment check FAILED.")
+    _check_cache = (time.monotonic(), cfg_mtime, (ok, lines))
     return ok, lines
 
 
@@ -318,22 +643,27 @@ def run_environment_wizard() -> None:
     print("  2. Build .venv using that interpreter")
     print("  3. Install requirements from config.json\n")
 
-    # Step 1: rewrite requirements from merged deps
+    # Steps 1+2 overlapped: write requirements and prewarm the package
+    # indexes in the background while the venv is being (re)built, so the
+    # filesystem and network latency hide behind the venv subprocess.
     _, deps = _load_env_config()
-    req_path = _write_requirements(deps)
-
-    # Step 2: choose interpreter for install
-    active_venv_python = _venv_python()
-    inside_venv = (sys.prefix != sys.base_prefix) and active_venv_python.exists() \
-                  and (Path(sys.executable).resolve() == active_venv_python.resolve())
-    if inside_venv:
-        pyexec = Path(sys.executable)
-        LOGGER.info("Installing into active venv: %s", pyexec)
-    else:
-        pyexec = _setup_venv()
-        if not pyexec:
-            print("Could not create venv.")
-            return
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        req_future = ex.submit(_write_requirements, deps)
+        ex.submit(_prewarm_indexes)
+
+        active_venv_python = _venv_python()
+        inside_venv = (sys.prefix != sys.base_prefix) and active_venv_python.exists() \
+                      and (Path(sys.executable).resolve() == active_venv_python.resolve())
+        if inside_venv:
+            pyexec = Path(sys.executable)
+            LOGGER.info("Installing into active venv: %s", pyexec)
+        else:
+            pyexec = _setup_venv()
+            if not pyexec:
+                print("Could not create venv.")
+                return
+
+        req_path = req_future.result()
 
     # Step 3: install requirements
     extra_idx = _torch_extra_index(deps)
@@ -346,6 +676,24 @@ def run_environment_wizard() -> None:
 
     # Step 4: post-install verification using the same interpreter
     print("\nRechecking environment with:", pyexec)
+
+    # When we installed into the interpreter we are already running, recheck
+    # in-process instead of paying a fresh interpreter startup plus a full
+    # re-import of the heavy packages in a subprocess.
+    if Path(sys.executable).resolve() == pyexec.resolve():
+        importlib.invalidate_caches()
+        ok, lines = check_environment()
+        print("\n".join(lines))
+        if not ok:
+            print("Post-install check failed.")
+            return
+        print("\nVenv ready.")
+        print("Activate with:")
+        print("  source .venv/bin/activate")
+        print("Run CLI:")
+        print("  python -m src.cli.main")
+        return
+
     try:
         out = subprocess.run(
             [
@@ -358,6 +706,7 @@ def run_environment_wizard() -> None:
             check=True,
             capture_output=True,
             text=True,
+            env=_SUBPROC_ENV,
         )
         print(out.stdout.strip())
     except subprocess.CalledProcessError as e:
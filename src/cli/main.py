@@ -3,17 +3,26 @@ import importlib
 import os
 import shutil
 import sys
+import threading
 from pathlib import Path
-from typing import List
+from typing import Callable, Dict, List
+
+
+_IS_WINDOWS = os.name == "nt"
 
 
 def _project_root() -> Path:
     return Path(__file__).resolve().parents[2]
 
 
+# Resolved once per process; the re-exec guard and venv helpers otherwise
+# re-stat the same path on every lookup.
+_VENV_PY = _project_root() / ".venv" / ("Scripts/python.exe" if _IS_WINDOWS else "bin/python")
+_REEXEC_CHECKED = False
+
+
 def _venv_python() -> Path:
-    v = _project_root() / ".venv"
-    return v / ("Scripts/python.exe" if os.name == "nt" else "bin/python")
+    return _VENV_PY
 
 
 def _in_venv() -> bool:
@@ -26,17 +35,36 @@ def _in_venv() -> bool:
 
 
 def _maybe_reexec_into_venv():
-    vp = _venv_python()
+    global _REEXEC_CHECKED
+    if _REEXEC_CHECKED:
+        return
+    _REEXEC_CHECKED = True
     # If .venv exists and we are not running inside it, re-exec the CLI under .venv/python
-    if vp.is_file() and not _in_venv():
-        os.execv(str(vp), [str(vp), "-m", "src.cli.main", *sys.argv[1:]])
+    if _VENV_PY.is_file() and not _in_venv():
+        os.execv(str(_VENV_PY), [str(_VENV_PY), "-m", "src.cli.main", *sys.argv[1:]])
 
 
 _maybe_reexec_into_venv()
 
 from src.utils.config import load_config
 from src.utils.logging import get_logger
-from src.cli.environment import check_environment, run_environment_wizard
+
+# mtime-keyed cache so menu/CLI flows share one parse of config.json and
+# only re-read when the file actually changes on disk.
+_CONFIG_CACHE = None
+
+
+def _cached_load_config(path: str = "config.json"):
+    global _CONFIG_CACHE
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = -1
+    if _CONFIG_CACHE is not None and _CONFIG_CACHE[0] == mtime:
+        return _CONFIG_CACHE[1]
+    config = load_config(path)
+    _CONFIG_CACHE = (mtime, config)
+    return config
 
 
 STAGE_MODULES = {
@@ -96,33 +124,49 @@ def parse_args(argv=None):
 
 
 def clear_screen() -> None:
-    os.system("cls" if os.name == "nt" else "clear")
+    os.system("cls" if _IS_WINDOWS else "clear")
 
 
 def pause() -> None:
     input("\nPress Enter to return to the menu...")
 
 
+# Each stage's run callable, registered on first use; after that,
+# dispatch is a dict lookup and a direct call (no import_module/getattr
+# string machinery per invocation).
+_STAGE_RUNNERS: Dict[str, Callable] = {}
+
+
+def _get_runner(stage_name: str) -> Callable:
+    runner = _STAGE_RUNNERS.get(stage_name)
+    if runner is not None and not os.environ.get("CISC473_RELOAD_STAGES"):
+        return runner
+
+    mod = importlib.import_module(STAGE_MODULES[stage_name])
+    if runner is not None:
+        # Dev escape hatch for editing stage code inside one menu
+        # session; never reloads the utils packages (package reload
+        # does not recurse into submodules anyway).
+        mod = importlib.reload(mod)
+    runner = mod.run
+    _STAGE_RUNNERS[stage_name] = runner
+    return runner
+
+
 def run_stage(stage_name: str, config) -> None:
     logger = get_logger("CLI")
     if stage_name not in STAGE_MODULES:
         logger.error("Unknown stage: %s", stage_name)
         raise SystemExit(1)
 
-    mod_path = STAGE_MODULES[stage_name]
     try:
-        mod = importlib.import_module(mod_path)
-        mod = importlib.reload(mod)
-        # Reload sibling utils if already imported to avoid stale helpers
-        pkg_name = mod_path.rsplit(".", 1)[0] + ".utils"
-        if pkg_name in sys.modules:
-            importlib.reload(sys.modules[pkg_name])
+        runner = _get_runner(stage_name)
     except Exception as e:
         logger.error("Failed to load stage '%s': %s", stage_name, e)
         raise SystemExit(1)
 
     logger.info("=== START %s ===", stage_name.upper())
-    getattr(mod, "run")(config)
+    runner(config)
     logger.info("=== END   %s ===", stage_name.upper())
 
 
@@ -150,7 +194,21 @@ def clear_workspace(preserve_logs: bool = True) -> None:
     for name in targets:
         path = os.path.join(results_root, name)
         if os.path.exists(path):
-            shutil.rmtree(path)
+            # Rename out of the way first (one atomic syscall even for a
+            # 200k-file tree), then unlink the renamed copy in the
+            # background so the menu returns immediately.
+            trash_path = "%s.trash.%d" % (path, os.getpid())
+            try:
+                os.rename(path, trash_path)
+            except OSError:
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                threading.Thread(
+                    target=shutil.rmtree,
+                    args=(trash_path,),
+                    kwargs={"ignore_errors": True},
+                    daemon=True,
+                ).start()
             logger.info("Removed '%s'.", path)
         os.makedirs(path, exist_ok=True)
         logger.info("Recreated '%s'.", path)
@@ -168,15 +226,27 @@ def show_logs(lines: int = 50) -> None:
         logger.info("No log file found when attempting to show logs.")
         return
 
+    # Read a bounded tail instead of the whole log (which can reach many
+    # MB after a full pipeline run); the window doubles until it holds
+    # enough newlines for the requested line count.
     try:
-        with open(log_path, "r", encoding="utf-8") as f:
-            all_lines = f.readlines()
+        with open(log_path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            window = 64 * 1024
+            while True:
+                read = min(size, window)
+                f.seek(size - read)
+                tail = f.read(read)
+                if read == size or tail.count(b"\n") > lines:
+                    break
+                window *= 2
     except OSError as e:
         print("(Failed to read log file: %s)" % e)
         logger.error("Failed to read log file: %s", e)
         return
 
-    for line in all_lines[-lines:]:
+    for line in tail.decode("utf-8", errors="replace").splitlines()[-lines:]:
         print(line.rstrip())
 
 
@@ -212,7 +282,15 @@ def show_config_summary(config) -> None:
 def interactive_menu() -> int:
     logger = get_logger("CLI")
     logger.info("Starting interactive CLI menu.")
-    config = load_config("config.json")
+    config = _cached_load_config("config.json")
+
+    # Selections may be entered as a comma-separated batch (e.g. "5,7");
+    # queued actions run back to back without re-prompting between them.
+    pending: List[str] = []
+
+    def _pause() -> None:
+        if not pending:
+            pause()
 
     while True:
         clear_screen()
@@ -228,20 +306,29 @@ def interactive_menu() -> int:
         print("[0] Exit")
         print("--------------------------------")
 
-        choice = input("Select an option: ").strip()
+        if pending:
+            choice = pending.pop(0)
+            print(f"Select an option: {choice} (queued)")
+        else:
+            raw = input("Select an option: ").strip()
+            parts = [p.strip() for p in raw.split(",") if p.strip()]
+            choice = parts[0] if parts else ""
+            pending = parts[1:]
 
         if choice == "1":
             clear_screen()
+            from src.cli.environment import check_environment
+
             ok, _ = check_environment()
             if not ok:
                 print(
                     "Environment check FAILED. Use option [7] to see setup steps "
                     "for venv/requirements or conda/env.yml."
                 )
-                pause()
+                _pause()
                 continue
             run_full_pipeline(config)
-            pause()
+            _pause()
         elif choice == "2":
             clear_screen()
             print("Available stages:\n")
@@ -258,36 +345,38 @@ def interactive_menu() -> int:
                 idx = int(raw)
             except ValueError:
                 print("\nInvalid selection.")
-                pause()
+                _pause()
                 continue
 
             if not (1 <= idx <= len(STAGE_ORDER)):
                 print("\nInvalid selection.")
-                pause()
+                _pause()
                 continue
 
             stage_name = STAGE_ORDER[idx - 1]
             clear_screen()
+            from src.cli.environment import check_environment
+
             ok, _ = check_environment()
             if not ok:
                 print(
                     "Environment check FAILED. Use option [7] to see setup steps "
                     "for venv/requirements or conda/env.yml."
                 )
-                pause()
+                _pause()
                 continue
 
             print(f"Running {STAGE_LABELS.get(stage_name, stage_name)}\n")
             run_stage(stage_name, config)
-            pause()
+            _pause()
         elif choice == "3":
             clear_screen()
             show_config_summary(config)
-            pause()
+            _pause()
         elif choice == "4":
             clear_screen()
             show_logs(lines=50)
-            pause()
+            _pause()
         elif choice == "5":
             clear_screen()
             confirm = input(
@@ -297,7 +386,7 @@ def interactive_menu() -> int:
                 clear_workspace(preserve_logs=True)
             else:
                 print("Cancelled.")
-            pause()
+            _pause()
         elif choice == "6":
             clear_screen()
             confirm = input(
@@ -307,17 +396,19 @@ def interactive_menu() -> int:
                 clear_workspace(preserve_logs=False)
             else:
                 print("Cancelled.")
-            pause()
+            _pause()
         elif choice == "7":
             clear_screen()
+            from src.cli.environment import run_environment_wizard
+
             run_environment_wizard()
-            pause()
+            _pause()
         elif choice == "0":
             logger.info("Exiting interactive CLI menu.")
             return 0
         else:
             print("\nInvalid selection.")
-            pause()
+            _pause()
 
 
 def main(argv=None):
@@ -330,9 +421,11 @@ def main(argv=None):
         logger = get_logger("CLI")
 
         logger.info("Loading configuration from config.json")
-        config = load_config("config.json")
+        config = _cached_load_config("config.json")
 
         if not args.skip_env_check:
+            from src.cli.environment import check_environment
+
             ok, _ = check_environment()
             if not ok:
                 logger.error(
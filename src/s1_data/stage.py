@@ -4,6 +4,7 @@ import shutil
 from src.utils.logging import get_logger
 from src.s1_data.utils.fs import (
     ensure_required_paths,
+    fan_out_images,
     list_image_filenames,
     load_metadata_frames,
 )
@@ -87,11 +88,8 @@ def run(config):
     else:
         # Copy everything (full set) to pruned-dataset for uniformity
         logger.info("S1: Copying full dataset to pruned-dataset (no sampling)...")
-        # Copy images
-        for img_id in image_filenames:
-            src = os.path.join(image_dir, img_id)
-            dst = os.path.join(pruned_img_dir, img_id)
-            shutil.copyfile(src, dst)
+        # Hardlink images (copy fallback) — no image bytes are duplicated
+        fan_out_images(image_dir, pruned_img_dir, image_filenames)
         # Copy CSVs
         for key, src_csv in csv_paths.items():
             dst_csv = os.path.join(pruned_root, os.path.basename(src_csv))
@@ -1,10 +1,15 @@
+from __future__ import annotations
+
 import os
-import shutil
-import random
-from typing import Dict, Set, Optional
-import pandas as pd
+from typing import TYPE_CHECKING, Dict, Set, Optional
+
+import numpy as np
 
 from src.utils.logging import get_logger
+from src.s1_data.utils.fs import fan_out_images
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 logger = get_logger("S1_PRUNE")
 
@@ -24,27 +29,51 @@ def prune_dataset(
         logger.info("S1_PRUNE: Requested sample_size >= dataset size; skipping pruning.")
         return image_filenames
 
-    rng = random.Random(seed)
-    sampled_ids = set(rng.sample(sorted(image_filenames), sample_size))
+    # numpy's object-array sort gives the deterministic ordering much
+    # cheaper than Python sorted() on 200k strings, and the seeded
+    # Generator draws the sample without shuffling a full list.
+    arr = np.fromiter(image_filenames, dtype=object, count=len(image_filenames))
+    arr.sort()
+    rng = np.random.default_rng(seed)
+    idx = rng.choice(len(arr), size=sample_size, replace=False)
+    sampled_ids = set(arr[idx].tolist())
     logger.info("S1_PRUNE: Sampled %d of %d images (seed=%s).", sample_size, len(image_filenames), seed)
 
     pruned_img_dir = os.path.join(out_dir, "img_align_celeba")
     os.makedirs(pruned_img_dir, exist_ok=True)
 
-    # Copy sampled images to pruned dir
-    for img_id in sampled_ids:
-        src = os.path.join(image_dir, img_id)
-        dst = os.path.join(pruned_img_dir, img_id)
-        shutil.copyfile(src, dst)
-    logger.info("S1_PRUNE: Copied %d images to '%s'.", len(sampled_ids), pruned_img_dir)
-
-    # Write pruned CSVs
-    for key, df in metadata_frames.items():
-        id_col = str(df.columns[0])
-        pruned_df = df[df[id_col].astype(str).isin(sampled_ids)]
+    # Hardlink sampled images into the pruned dir (copy fallback)
+    fan_out_images(image_dir, pruned_img_dir, sampled_ids)
+    logger.info("S1_PRUNE: Linked %d images to '%s'.", len(sampled_ids), pruned_img_dir)
+
+    # Write pruned CSVs by streaming the originals in chunks; the filter
+    # never holds more than one chunk (plus the kept rows being written),
+    # instead of a full-frame filtered copy per table.
+    import pandas as pd
+
+    for key in metadata_frames:
         csv_out = os.path.join(out_dir, os.path.basename(csv_paths[key]))
-        pruned_df.to_csv(csv_out, index=False)
-        logger.info("S1_PRUNE: Wrote pruned CSV for '%s' (%d rows) to '%s'.", key, len(pruned_df), csv_out)
+        rows_kept = 0
+        # Same first-line separator sniff and comment handling as
+        # _read_generic_csv, so the chunked re-read parses identically
+        # to the full-frame load these files came from.
+        with open(csv_paths[key], "r", encoding="utf-8") as f:
+            first_line = f.readline()
+        sep = "," if "," in first_line else r"\s+"
+        with open(csv_out, "w", newline="", encoding="utf-8") as w:
+            reader = pd.read_csv(
+                csv_paths[key],
+                sep=sep,
+                chunksize=50_000,
+                engine="c",
+                comment="#",
+                dtype={0: str},
+            )
+            for i, chunk in enumerate(reader):
+                kept = chunk[chunk.iloc[:, 0].isin(sampled_ids)]
+                kept.to_csv(w, index=False, header=(i == 0))
+                rows_kept += len(kept)
+        logger.info("S1_PRUNE: Wrote pruned CSV for '%s' (%d rows) to '%s'.", key, rows_kept, csv_out)
 
     logger.info("S1_PRUNE: Pruning completed: pruned dataset in '%s'.", out_dir)
     return sampled_ids
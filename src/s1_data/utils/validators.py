@@ -1,11 +1,16 @@
 # src/s1_data/utils/validators.py
 
-from typing import Dict, Iterable, Set
+from __future__ import annotations
 
-import pandas as pd
+from typing import TYPE_CHECKING, Dict, Set
+
+import numpy as np
 
 from src.utils.logging import get_logger
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 logger = get_logger("S1_VAL")
 
@@ -45,12 +50,6 @@ def validate_csv_schemas(metadata_frames: Dict[str, pd.DataFrame]) -> None:
         logger.info("S1: CSV '%s' columns: %s", key, ", ".join(map(str, cols)))
 
 
-def _ids_from_frame(df: pd.DataFrame) -> Set[str]:
-    """Extract the ID set from a metadata frame (first column as string)."""
-    id_col = _id_column(df)
-    return set(df[id_col].astype(str))
-
-
 def validate_id_consistency(
     image_filenames: Set[str],
     metadata_frames: Dict[str, pd.DataFrame],
@@ -64,13 +63,16 @@ def validate_id_consistency(
         raise SystemExit(1)
 
     for key, df in metadata_frames.items():
-        csv_ids = _ids_from_frame(df)
-
-        missing_in_images = csv_ids - image_filenames
-        missing_in_csv = image_filenames - csv_ids
-
-        if missing_in_images:
-            sample = sorted(list(missing_in_images))[:10]
+        col = df[_id_column(df)]
+        if col.dtype != object:
+            col = col.astype(str)
+
+        # Membership runs through pandas' C-level isin hashtable; the old
+        # per-frame set(astype(str)) allocated a Python string per row.
+        in_images = col.isin(image_filenames)
+        if not in_images.all():
+            missing_in_images = col[~in_images]
+            sample = sorted(missing_in_images)[:10]
             logger.error(
                 "S1: CSV '%s' references %d IDs not found in images. Sample: %s",
                 key,
@@ -80,8 +82,12 @@ def validate_id_consistency(
             raise SystemExit(1)
 
         # For strictness, enforce that all images have metadata everywhere.
-        if missing_in_csv:
-            sample = sorted(list(missing_in_csv))[:10]
+        # Every CSV ID is an image here, so the sets are equal iff the
+        # unique counts match; the reverse difference is only materialized
+        # on the failure path.
+        if col.nunique() != len(image_filenames):
+            missing_in_csv = image_filenames.difference(col)
+            sample = sorted(missing_in_csv)[:10]
             logger.error(
                 "S1: %d images are missing from CSV '%s'. Sample: %s",
                 len(missing_in_csv),
@@ -93,7 +99,7 @@ def validate_id_consistency(
         logger.info(
             "S1: ID consistency OK for CSV '%s' (%d IDs).",
             key,
-            len(csv_ids),
+            len(col),
         )
 
 
@@ -114,8 +120,12 @@ def validate_partitions(partition_df: pd.DataFrame) -> None:
     id_col = cols[0]
     part_col = cols[1]
 
-    labels = partition_df[part_col]
-    unique_labels = set(labels.unique())
+    # One pass over the label column yields both the label set and the
+    # distribution; the previous unique/value_counts/duplicated trio
+    # traversed the column three times.
+    labels_arr = partition_df[part_col].to_numpy()
+    uniq, label_counts = np.unique(labels_arr, return_counts=True)
+    unique_labels = set(uniq.tolist())
 
     allowed = {0, 1, 2}
     if not unique_labels.issubset(allowed):
@@ -126,12 +136,14 @@ def validate_partitions(partition_df: pd.DataFrame) -> None:
         )
         raise SystemExit(1)
 
-    counts = labels.value_counts().to_dict()
+    counts = dict(zip(uniq.tolist(), label_counts.tolist()))
     logger.info("S1: Partition label distribution: %s", counts)
 
-    # Optional: check for duplicate IDs
-    dup_ids = partition_df[id_col].astype(str).duplicated()
-    num_dups = int(dup_ids.sum())
+    # Optional: check for duplicate IDs (C-level unique, no str casting)
+    import pandas as pd
+
+    ids = partition_df[id_col].to_numpy()
+    num_dups = len(ids) - len(pd.unique(ids))
     if num_dups > 0:
         logger.error(
             "S1: Partition CSV has %d duplicate IDs in column '%s'.",
@@ -152,14 +164,20 @@ def log_dataset_summary(
         len(metadata_frames),
     )
 
-    # Intersection size across all metadata tables
-    id_sets = [_ids_from_frame(df) for df in metadata_frames.values()]
-    if not id_sets:
+    # Intersection size across all metadata tables via pandas Index
+    # chaining — C-level hashtable intersection, no per-element Python
+    # string hashing like set.intersection over 200k-entry sets.
+    import pandas as pd
+
+    if not metadata_frames:
         logger.error("S1: No metadata frames available for summary.")
         raise SystemExit(1)
 
-    intersection = set.intersection(*id_sets)
+    idx_list = [pd.Index(df[_id_column(df)]) for df in metadata_frames.values()]
+    common = idx_list[0]
+    for ix in idx_list[1:]:
+        common = common.intersection(ix, sort=False)
     logger.info(
         "S1: IDs present in all metadata CSVs: %d.",
-        len(intersection),
+        len(common),
     )
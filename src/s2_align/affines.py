@@ -0,0 +1,87 @@
+# src/s2_align/affines.py
+
+"""
+Shared similarity-transform cache for S2.
+
+S2A and S2B derive the same per-image affine from the same landmarks.
+Solve all of them once with a batched closed-form Umeyama, persist as a
+(N, 2, 3) float32 .npy next to the S2 outputs, and let both stages mmap
+the result instead of re-estimating.
+"""
+
+import os
+
+import numpy as np
+
+from src.utils.logging import get_logger
+from src.s2_align.s2a import (
+    S2_OUT_ROOT,
+    _CANONICAL_CENTERED,
+    _CANONICAL_MU,
+)
+
+logger = get_logger("S2_AFFINES")
+
+AFFINES_NPY = os.path.join(S2_OUT_ROOT, "affines.npy")
+AFFINES_DEGEN_NPY = os.path.join(S2_OUT_ROOT, "affines_degenerate.npy")
+AFFINES_INDEX = os.path.join(S2_OUT_ROOT, "affines_index.txt")
+
+
+def batched_umeyama(lm):
+    """Solve forward similarity transforms onto CANONICAL_5PT for a
+    whole (N, 5, 2) landmark stack at once.
+
+    Returns (M, degenerate): M is (N, 2, 3) float32; degenerate flags
+    rows whose landmarks have zero spread (their M rows are meaningless).
+    """
+    lm = np.asarray(lm, dtype=np.float64)
+    mu_s = lm.mean(axis=1)
+    src_c = lm - mu_s[:, None, :]
+    var_s = (src_c ** 2).sum(axis=(1, 2))
+    degenerate = var_s == 0.0
+    var_s = np.where(degenerate, 1.0, var_s)
+
+    H = np.einsum("ki,nkj->nij", _CANONICAL_CENTERED, src_c)
+    U, S, Vt = np.linalg.svd(H)
+    d = np.sign(np.linalg.det(U) * np.linalg.det(Vt))
+    d[d == 0] = 1.0
+    flip = np.stack([np.ones_like(d), d], axis=1)
+    R = (U * flip[:, None, :]) @ Vt
+    scale = (S * flip).sum(axis=1) / var_s
+    A = scale[:, None, None] * R
+    t = _CANONICAL_MU - np.einsum("nij,nj->ni", A, mu_s)
+
+    M = np.concatenate([A, t[:, :, None]], axis=2).astype(np.float32)
+    return M, degenerate
+
+
+def save_affine_cache(fnames, M, degenerate):
+    """Persist the (N, 2, 3) matrix stack, its degenerate mask and the
+    filename index. The mask travels with the matrices because degenerate
+    rows hold meaningless values — a consumer must know to skip them."""
+    os.makedirs(S2_OUT_ROOT, exist_ok=True)
+    np.save(AFFINES_NPY, M)
+    np.save(AFFINES_DEGEN_NPY, np.asarray(degenerate, dtype=bool))
+    with open(AFFINES_INDEX, "w", encoding="utf-8") as f:
+        f.write("\n".join(fnames))
+    logger.info("S2: Cached %d affines to '%s'.", len(M), AFFINES_NPY)
+
+
+def load_affine_cache():
+    """Return (idx_map, M, degenerate) from disk, M memory-mapped, or
+    None if absent or inconsistent."""
+    if not (os.path.isfile(AFFINES_NPY) and os.path.isfile(AFFINES_DEGEN_NPY)
+            and os.path.isfile(AFFINES_INDEX)):
+        return None
+    try:
+        M = np.load(AFFINES_NPY, mmap_mode="r")
+        degenerate = np.load(AFFINES_DEGEN_NPY)
+        with open(AFFINES_INDEX, "r", encoding="utf-8") as f:
+            fnames = f.read().splitlines()
+    except (OSError, ValueError) as e:
+        logger.warning("S2: Could not load affine cache: %s", e)
+        return None
+    if len(fnames) != len(M) or len(degenerate) != len(M):
+        logger.warning("S2: Affine cache index/matrix length mismatch; ignoring.")
+        return None
+    return {fn: i for i, fn in enumerate(fnames)}, M, degenerate
@@ -14,8 +14,9 @@ Usage (developer only, run once):
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
-from PIL import Image
 import cv2
 import pandas as pd
 
@@ -58,22 +59,238 @@ def ensure_dir(path):
     return path
 
 
-def read_landmarks(df, fname):
-    """Return 5×2 landmarks for a given filename."""
-    id_col = df.columns[0]
-    row = df[df[id_col].astype(str) == str(fname)]
-    if row.empty:
+# Baseline-only JPEG at q=95: Huffman optimization and progressive
+# passes are explicitly off, keeping the encoder on its fastest path.
+_JPEG_PARAMS = [
+    int(cv2.IMWRITE_JPEG_QUALITY), 95,
+    int(cv2.IMWRITE_JPEG_OPTIMIZE), 0,
+    int(cv2.IMWRITE_JPEG_PROGRESSIVE), 0,
+]
+
+
+# Target-side statistics never change, so they are computed once here
+# rather than per image.
+_CANONICAL_MU = CANONICAL_5PT.mean(axis=0)
+_CANONICAL_CENTERED = CANONICAL_5PT - _CANONICAL_MU
+
+
+def estimate_similarity_to_canonical(src_pts):
+    """Similarity transform onto CANONICAL_5PT (closed-form Umeyama).
+
+    Specialized for the fixed canonical target: its mean and centered
+    points are module constants, so only source-side statistics are
+    computed per image. This is the form both S2A paths call.
+    """
+    return _umeyama(src_pts, _CANONICAL_MU, _CANONICAL_CENTERED)
+
+
+def estimate_similarity_transform(src_pts, dst_pts=CANONICAL_5PT):
+    """Compute similarity transform (closed-form Umeyama).
+
+    Five exact correspondences need no robust estimator; one mean, one
+    2x2 covariance, and one SVD replace the iterative LMEDS solver.
+    """
+    if dst_pts is CANONICAL_5PT:
+        return estimate_similarity_to_canonical(src_pts)
+    mu_d = dst_pts.mean(axis=0)
+    dst_c = dst_pts - mu_d
+    return _umeyama(src_pts, mu_d, dst_c)
+
+
+def _umeyama(src_pts, mu_d, dst_c):
+    mu_s = src_pts.mean(axis=0)
+    src_c = src_pts - mu_s
+    var_s = float((src_c ** 2).sum())
+    if var_s == 0.0:
         return None
-    vals = row.values[0][1:]
-    return np.array(vals, dtype=float).reshape(5, 2)
 
+    H = dst_c.T @ src_c
+    U, S, Vt = np.linalg.svd(H)
+    d = 1.0 if np.linalg.det(U) * np.linalg.det(Vt) >= 0.0 else -1.0
+    flip = np.array([1.0, d])
+    R = (U * flip) @ Vt
+    scale = float((S * flip).sum()) / var_s
 
-def estimate_similarity_transform(src_pts, dst_pts):
-    """Compute similarity transform."""
-    M = cv2.estimateAffinePartial2D(src_pts, dst_pts, method=cv2.LMEDS)[0]
+    M = np.empty((2, 3), dtype=np.float32)
+    M[:, :2] = scale * R
+    M[:, 2] = mu_d - scale * (R @ mu_s)
     return M
 
 
+# Destination pixel grid in homogeneous coordinates, built once; per
+# image only a 2x3 matmul is needed to turn it into the source-coord
+# maps that cv2.remap consumes.
+_DST_GRID = np.vstack([
+    np.tile(np.arange(TARGET_SIZE, dtype=np.float32), TARGET_SIZE),
+    np.repeat(np.arange(TARGET_SIZE, dtype=np.float32), TARGET_SIZE),
+    np.ones(TARGET_SIZE * TARGET_SIZE, dtype=np.float32),
+])
+
+# Optional (N, 256, 256, 3) uint8 memmap written alongside the JPEGs so
+# downstream stages can slice decoded pixels instead of re-decoding
+# JPEG per file. Bound by run_s2a for the duration of a run; rows for
+# skipped images stay zero. Row order follows aligned_index.txt.
+_ALIGNED_MM = None
+
+
+def _process_one(task):
+    """Align a single image. Runs in a pool worker.
+
+    Returns (ok, fname, message); logging happens in the parent so all
+    records land on the one pipeline.log handler.
+    """
+    fname, pts, idx, M = task
+    in_path = os.path.join(RAW_IMG_DIR, fname)
+
+    # OpenCV decodes straight into a numpy array (no PIL object plus a
+    # full-image copy); the warp is channel-agnostic so BGR order is kept
+    # end to end.
+    raw_arr = cv2.imread(in_path, cv2.IMREAD_COLOR)
+    if raw_arr is None:
+        return False, fname, "Cannot read '%s'." % fname
+
+    h, w = raw_arr.shape[:2]
+
+    # Validate bounds with three scalar reductions instead of four
+    # boolean temporaries (this runs once per image across the dataset)
+    if pts.min() < 0 or pts[:, 0].max() >= w or pts[:, 1].max() >= h:
+        return False, fname, "Out-of-bound landmarks in '%s'." % fname
+
+    # Transform comes precomputed from the batched solve in run_s2a
+    if M is None:
+        return False, fname, "Transform failed for '%s'." % fname
+
+    # Apply warp via remap with the shared destination grid: invert the
+    # forward affine (what warpAffine does internally each call) and map
+    # all destination pixels to source coords in one matmul.
+    A_inv = np.linalg.inv(M[:, :2])
+    M_inv = np.hstack([A_inv, (-A_inv @ M[:, 2])[:, None]]).astype(np.float32)
+    src_map = (M_inv @ _DST_GRID).reshape(2, TARGET_SIZE, TARGET_SIZE)
+    aligned = cv2.remap(
+        raw_arr,
+        src_map[0],
+        src_map[1],
+        cv2.INTER_LINEAR,
+        borderMode=cv2.BORDER_CONSTANT,
+        borderValue=0,
+    )
+
+    # Save
+    if _ALIGNED_MM is not None:
+        _ALIGNED_MM[idx] = aligned
+    out_path = os.path.join(OUT_IMG_DIR, fname)
+    cv2.imwrite(out_path, aligned, _JPEG_PARAMS)
+    return True, fname, None
+
+
+def _gpu_warp_available():
+    """True when torch with a CUDA device is importable."""
+    try:
+        import torch
+    except Exception:
+        return False
+    return torch.cuda.is_available()
+
+
+def _theta_from_affine(M, in_w, in_h, out_w, out_h):
+    """Convert a pixel-space 2x3 forward affine into a grid_sample theta.
+
+    grid_sample wants the inverse mapping (output -> input) in [-1, 1]
+    normalized coordinates with align_corners=True conventions.
+    """
+    A = M[:, :2].astype(np.float64)
+    t = M[:, 2].astype(np.float64)
+    Ainv = np.linalg.inv(A)
+    tinv = -Ainv @ t
+
+    s_in = np.array([2.0 / (in_w - 1), 2.0 / (in_h - 1)])
+    s_out = np.array([(out_w - 1) / 2.0, (out_h - 1) / 2.0])
+    B = (s_in[:, None] * Ainv) * s_out[None, :]
+    c = s_in * (Ainv @ s_out + tinv) - 1.0
+    return np.concatenate([B, c[:, None]], axis=1).astype(np.float32)
+
+
+def run_s2a_gpu(tasks, batch_size=128):
+    """Batched GPU warp path: decode on a reader pool, warp whole
+    batches with one grid_sample launch, encode on a writer pool.
+
+    Yields the same (ok, fname, message) tuples as the CPU pool so the
+    caller's accounting/logging is identical.
+    """
+    import torch
+    import torch.nn.functional as F
+
+    device = torch.device("cuda")
+    size = (TARGET_SIZE, TARGET_SIZE)
+
+    def _load(task):
+        fname, pts, idx, M = task
+        arr = cv2.imread(os.path.join(RAW_IMG_DIR, fname), cv2.IMREAD_COLOR)
+        return fname, pts, idx, M, arr
+
+    with ThreadPoolExecutor(max_workers=8) as readers, \
+            ThreadPoolExecutor(max_workers=8) as writers:
+        pending = []
+        for start in range(0, len(tasks), batch_size):
+            batch = list(readers.map(_load, tasks[start:start + batch_size]))
+
+            # Same-shape groups batch into a single stacked tensor; CelebA
+            # raw images are uniform, so this is normally one group.
+            groups = {}
+            for fname, pts, idx, M, arr in batch:
+                if arr is None:
+                    yield False, fname, "Cannot read '%s'." % fname
+                    continue
+                h, w = arr.shape[:2]
+                if pts.min() < 0 or pts[:, 0].max() >= w or pts[:, 1].max() >= h:
+                    yield False, fname, "Out-of-bound landmarks in '%s'." % fname
+                    continue
+                if M is None:
+                    yield False, fname, "Transform failed for '%s'." % fname
+                    continue
+                groups.setdefault((h, w), []).append((fname, idx, arr, M))
+
+            for (h, w), items in groups.items():
+                stack = np.stack([arr for _, _, arr, _ in items])
+                thetas = np.stack([
+                    _theta_from_affine(M, w, h, TARGET_SIZE, TARGET_SIZE)
+                    for _, _, _, M in items
+                ])
+                imgs = torch.from_numpy(stack).to(device, non_blocking=True)
+                imgs = imgs.permute(0, 3, 1, 2).float()
+                grid = F.affine_grid(
+                    torch.from_numpy(thetas).to(device),
+                    (len(items), 3, *size),
+                    align_corners=True,
+                )
+                warped = F.grid_sample(
+                    imgs, grid, mode="bilinear",
+                    padding_mode="zeros", align_corners=True,
+                )
+                out = warped.round_().clamp_(0, 255).byte()
+                out = out.permute(0, 2, 3, 1).cpu().numpy()
+
+                for (fname, idx, _, _), aligned in zip(items, out):
+                    if _ALIGNED_MM is not None:
+                        _ALIGNED_MM[idx] = aligned
+                    pending.append((fname, writers.submit(
+                        cv2.imwrite,
+                        os.path.join(OUT_IMG_DIR, fname),
+                        aligned,
+                        _JPEG_PARAMS,
+                    )))
+
+            # Drain completed writes so memory stays bounded
+            while pending and pending[0][1].done():
+                fname, fut = pending.pop(0)
+                ok = bool(fut.result())
+                yield ok, fname, None if ok else "Cannot write '%s'." % fname
+
+        for fname, fut in pending:
+            ok = bool(fut.result())
+            yield ok, fname, None if ok else "Cannot write '%s'." % fname
+
+
 # ------------------------------------------------------------
 # Main
 # ------------------------------------------------------------
@@ -95,68 +312,91 @@ def run_s2a():
     df_landmarks = pd.read_csv(LANDMARK_CSV)
     logger.info("S2A: Loaded %d landmark rows.", len(df_landmarks))
 
-    # List images in pruned dataset
-    raw_fnames = sorted([f for f in os.listdir(RAW_IMG_DIR) if f.endswith(".jpg")])
+    # List images in pruned dataset (scandir avoids a second stat pass;
+    # sorted so the memmap row order is deterministic across runs)
+    with os.scandir(RAW_IMG_DIR) as it:
+        raw_fnames = sorted(e.name for e in it if e.name.endswith(".jpg"))
     logger.info("S2A: Found %d images for alignment.", len(raw_fnames))
 
     processed = 0
     skipped = 0
 
-    for fname in raw_fnames:
-        in_path = os.path.join(RAW_IMG_DIR, fname)
-
-        # Read image
-        try:
-            img = Image.open(in_path).convert("RGB")
-        except Exception as e:
-            logger.error("S2A: Cannot read '%s': %s", fname, e)
-            skipped += 1
-            continue
+    # Landmarks as a filename -> (5,2) float32 lookup so pool workers
+    # never touch pandas.
+    id_col = df_landmarks.columns[0]
+    lm_map = dict(zip(
+        df_landmarks[id_col].astype(str),
+        df_landmarks.iloc[:, 1:].to_numpy(np.float32).reshape(-1, 5, 2),
+    ))
 
-        raw_arr = np.array(img)
-        h, w = raw_arr.shape[:2]
-
-        # Read landmarks
-        pts = read_landmarks(df_landmarks, fname)
+    tasks = []
+    for fname in raw_fnames:
+        pts = lm_map.get(fname)
         if pts is None:
             logger.error("S2A: Missing landmarks for '%s'.", fname)
             skipped += 1
-            continue
-
-        # Validate bounds
-        if not ((pts[:, 0] >= 0).all() and (pts[:, 0] < w).all() and
-                (pts[:, 1] >= 0).all() and (pts[:, 1] < h).all()):
-            logger.error("S2A: Out-of-bound landmarks in '%s'.", fname)
-            skipped += 1
-            continue
-
-        # Compute transform
-        M = estimate_similarity_transform(
-            src_pts=pts.astype(np.float32),
-            dst_pts=CANONICAL_5PT,
-        )
-        if M is None:
-            logger.error("S2A: Transform failed for '%s'.", fname)
-            skipped += 1
-            continue
-
-        # Apply warp
-        aligned = cv2.warpAffine(
-            raw_arr,
-            M,
-            (TARGET_SIZE, TARGET_SIZE),
-            flags=cv2.INTER_LINEAR,
-            borderMode=cv2.BORDER_CONSTANT,
-            borderValue=0,
+        else:
+            tasks.append((fname, pts, len(tasks)))
+
+    # Solve every transform in one batched call and persist the result;
+    # S2B mmaps the same cache instead of re-deriving matrices from the
+    # identical landmarks. Imported lazily (affines.py imports this
+    # module's canonical constants).
+    from src.s2_align.affines import batched_umeyama, save_affine_cache
+
+    if tasks:
+        Ms, degenerate = batched_umeyama(np.stack([pts for _, pts, _ in tasks]))
+        save_affine_cache([fname for fname, _, _ in tasks], Ms, degenerate)
+        tasks = [
+            (fname, pts, idx, None if degenerate[i] else Ms[i])
+            for i, (fname, pts, idx) in enumerate(tasks)
+        ]
+
+    # Decoded-pixel store: one flat uint8 tensor plus an index file so
+    # later stages can mmap rows instead of re-decoding JPEGs. The index
+    # is written even when empty; the memmap is not — np.memmap refuses
+    # to map a zero-byte file.
+    global _ALIGNED_MM
+    index_path = os.path.join(S2_OUT_ROOT, "aligned_index.txt")
+    with open(index_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(fname for fname, _, _, _ in tasks))
+    if tasks:
+        mm_path = os.path.join(S2_OUT_ROOT, "aligned.u8")
+        _ALIGNED_MM = np.memmap(
+            mm_path,
+            dtype=np.uint8,
+            mode="w+",
+            shape=(len(tasks), TARGET_SIZE, TARGET_SIZE, 3),
         )
-
-        # Save
-        out_path = os.path.join(OUT_IMG_DIR, fname)
-        Image.fromarray(aligned).save(out_path, quality=95)
-
-        processed += 1
-        if processed % 5000 == 0:
-            logger.info("S2A: Processed %d images...", processed)
+        logger.info("S2A: Writing decoded tensor store to '%s'.", mm_path)
+
+    def _consume(results):
+        nonlocal processed, skipped
+        for ok, fname, msg in results:
+            if not ok:
+                logger.error("S2A: %s", msg)
+                skipped += 1
+                continue
+            processed += 1
+            if processed % 5000 == 0:
+                logger.info("S2A: Processed %d images...", processed)
+
+    if _gpu_warp_available():
+        # All per-batch affines run as one grid_sample kernel launch.
+        logger.info("S2A: CUDA available; using batched GPU warp path.")
+        _consume(run_s2a_gpu(tasks))
+    else:
+        # OpenCV releases the GIL in imread/remap/imwrite, so a thread
+        # pool parallelizes the per-image work at the C++ level without
+        # process startup or task pickling; one OpenCV thread per worker
+        # keeps the pool itself as the only source of parallelism.
+        cv2.setNumThreads(1)
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+            _consume(ex.map(_process_one, tasks))
+
+    if _ALIGNED_MM is not None:
+        _ALIGNED_MM.flush()
+        _ALIGNED_MM = None
 
     logger.info("S2A: Completed. Processed=%d, Skipped=%d", processed, skipped)
     logger.info("S2A: Output directory: %s", OUT_IMG_DIR)
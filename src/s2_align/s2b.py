@@ -14,16 +14,15 @@ Usage:
     python src/s2_align/s2b.py
 """
 
+import csv
 import os
+
 import numpy as np
 import pandas as pd
 
 from src.utils.logging import get_logger
-from src.s2_align.s2a import (
-    CANONICAL_5PT,
-    TARGET_SIZE,
-    estimate_similarity_transform,
-)
+from src.s2_align.s2a import TARGET_SIZE
+from src.s2_align.affines import batched_umeyama, load_affine_cache
 
 logger = get_logger("S2B")
 
@@ -40,29 +39,40 @@ RAW_LANDMARKS_CSV = os.path.join(PRUNED_ROOT, "list_landmarks_align_celeba.csv")
 OUT_BBOX_CSV = os.path.join(S2_OUT_ROOT, "list_bbox_celeba.csv")
 
 
+def _narrow_read(path, value_dtype):
+    """Read a CelebA CSV on the C engine with narrow value dtypes.
+
+    The regex separator previously forced pandas' pure-Python parser;
+    these files are plain comma-separated, so peek the header for column
+    names and hand the C engine an explicit dtype map.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        header = f.readline().strip().split(",")
+    dtype = {header[0]: str}
+    dtype.update({c: value_dtype for c in header[1:]})
+    return pd.read_csv(path, engine="c", comment="#", dtype=dtype)
+
+
 # ------------------------------------------------------------
 # Bounding box transform helper
 # ------------------------------------------------------------
 def _transform_bbox(M: np.ndarray, x: float, y: float, w: float, h: float):
-    """Transform bbox using affine matrix M."""
-    corners = np.array(
-        [
-            [x, y],
-            [x + w, y + h],
-        ],
-        dtype=np.float32,
-    )
-    ones = np.ones((2, 1), dtype=np.float32)
-    homog = np.hstack([corners, ones])  # shape (2, 3)
-
-    transformed = (M @ homog.T).T  # shape (2, 2)
-    xs = transformed[:, 0]
-    ys = transformed[:, 1]
-
-    x_min = float(xs.min())
-    y_min = float(ys.min())
-    x_max = float(xs.max())
-    y_max = float(ys.max())
+    """Transform bbox using affine matrix M.
+
+    Scalar math on the six affine coefficients — no tiny ndarray
+    allocations per call. The hot path in run_s2b is batched and does
+    not call this; it remains for one-off/scripted use.
+    """
+    a, b, tx = float(M[0, 0]), float(M[0, 1]), float(M[0, 2])
+    c, d, ty = float(M[1, 0]), float(M[1, 1]), float(M[1, 2])
+
+    x0 = a * x + b * y + tx
+    y0 = c * x + d * y + ty
+    x1 = a * (x + w) + b * (y + h) + tx
+    y1 = c * (x + w) + d * (y + h) + ty
+
+    x_min, x_max = (x0, x1) if x0 < x1 else (x1, x0)
+    y_min, y_max = (y0, y1) if y0 < y1 else (y1, y0)
 
     w_new = x_max - x_min
     h_new = y_max - y_min
@@ -95,88 +105,97 @@ def run_s2b():
 
     # Load bbox CSV
     logger.info("S2B: Loading raw bbox CSV: %s", RAW_BBOX_CSV)
-    df_bbox = pd.read_csv(
-        RAW_BBOX_CSV,
-        sep=r"\s+|,",
-        engine="python",
-        comment="#",
-    )
+    df_bbox = _narrow_read(RAW_BBOX_CSV, np.int32)
 
     # Load landmarks CSV
     logger.info("S2B: Loading landmarks: %s", RAW_LANDMARKS_CSV)
-    df_landmarks = pd.read_csv(
-        RAW_LANDMARKS_CSV,
-        sep=r"\s+|,",
-        engine="python",
-        comment="#",
-    )
-
-    # Index landmarks by filename
+    df_landmarks = _narrow_read(RAW_LANDMARKS_CSV, np.float32)
+
+    # Index landmarks by filename (dict + plain ndarray; no per-row .loc)
     lm_id_col = df_landmarks.columns[0]
-    df_landmarks = df_landmarks.set_index(lm_id_col)
+    idx_map = {fn: i for i, fn in enumerate(df_landmarks[lm_id_col].astype(str))}
+    lm_all = df_landmarks.iloc[:, 1:].to_numpy(dtype=np.float64)
+    if lm_all.shape[1] != 10:
+        logger.error("S2B: Landmark CSV has %d value columns (expected 10).", lm_all.shape[1])
+        raise SystemExit(1)
 
     bbox_id_col = df_bbox.columns[0]
     bbox_cols = list(df_bbox.columns[1:5])  # x, y, w, h
 
     n_total = len(df_bbox)
-    n_ok = 0
-    n_fail = 0
-
-    for idx, row in df_bbox.iterrows():
-        fname = str(row[bbox_id_col])
-
-        # Raw bbox values
-        try:
-            x_raw = float(row[bbox_cols[0]])
-            y_raw = float(row[bbox_cols[1]])
-            w_raw = float(row[bbox_cols[2]])
-            h_raw = float(row[bbox_cols[3]])
-        except Exception as e:
-            logger.error("S2B: Invalid bbox for '%s': %s", fname, e)
-            n_fail += 1
-            continue
-
-        # Fetch corresponding landmarks
-        try:
-            lm_vals = df_landmarks.loc[fname].values.astype(float)
-        except KeyError:
-            logger.error("S2B: Missing landmarks for '%s'.", fname)
-            n_fail += 1
-            continue
-
-        if lm_vals.shape[0] != 10:
-            logger.error("S2B: Landmark shape invalid for '%s'.", fname)
-            n_fail += 1
-            continue
-
-        pts = lm_vals.reshape(5, 2)
-
-        # Recompute similarity transform
-        M = estimate_similarity_transform(
-            src_pts=pts.astype(np.float32),
-            dst_pts=CANONICAL_5PT,
-        )
-        if M is None:
-            logger.error("S2B: Transform failed for '%s'.", fname)
-            n_fail += 1
-            continue
-
-        # Transform bbox → aligned space
-        x_al, y_al, w_al, h_al = _transform_bbox(M, x_raw, y_raw, w_raw, h_raw)
-
-        # Store updated aligned-space bbox
-        df_bbox.at[idx, bbox_cols[0]] = int(round(x_al))
-        df_bbox.at[idx, bbox_cols[1]] = int(round(y_al))
-        df_bbox.at[idx, bbox_cols[2]] = int(round(w_al))
-        df_bbox.at[idx, bbox_cols[3]] = int(round(h_al))
-
-        n_ok += 1
-
-        if (idx + 1) % 10000 == 0:
-            logger.info("S2B: %d / %d processed...", idx + 1, n_total)
+
+    fnames = df_bbox[bbox_id_col].astype(str)
+    rows = fnames.map(idx_map)
+    valid = rows.notna().to_numpy()
+    for fname in fnames[~valid]:
+        logger.error("S2B: Missing landmarks for '%s'.", fname)
+
+    valid_names = fnames[valid].to_numpy()
+
+    # Reuse the S2A affine cache when it covers every row; otherwise
+    # solve once here with the same batched closed-form Umeyama.
+    cache = load_affine_cache()
+    M = None
+    if cache is not None:
+        cache_map, cache_M, cache_degen = cache
+        cache_rows = [cache_map.get(fn) for fn in valid_names]
+        if all(r is not None for r in cache_rows):
+            logger.info("S2B: Using cached affines from S2A.")
+            M = np.asarray(cache_M[cache_rows], dtype=np.float64)
+            # Degenerate rows hold meaningless matrices; honoring the
+            # cached mask keeps their raw bboxes, same as the solve path.
+            degenerate = cache_degen[cache_rows]
+
+    if M is None:
+        lm = lm_all[rows[valid].to_numpy(dtype=np.int64)].reshape(-1, 5, 2)
+        M64, degenerate = batched_umeyama(lm)
+        M = M64.astype(np.float64)
+
+    A = M[:, :, :2]  # (n, 2, 2) linear parts
+    t = M[:, :, 2]
+
+    # Transform the two bbox corners of every row in one shot
+    vals = df_bbox.loc[valid, bbox_cols].to_numpy(dtype=np.float64)
+    x, y, w, h = vals.T
+    corners = np.stack(
+        [np.stack([x, y], axis=1), np.stack([x + w, y + h], axis=1)],
+        axis=1,
+    )  # (n, 2 corners, 2)
+    transformed = np.einsum("nij,nkj->nki", A, corners) + t[:, None, :]
+
+    xs = transformed[:, :, 0]
+    ys = transformed[:, :, 1]
+    x_min = xs.min(axis=1)
+    y_min = ys.min(axis=1)
+    w_new = xs.max(axis=1) - x_min
+    h_new = ys.max(axis=1) - y_min
+
+    # Clip to 256×256 canvas
+    x_min = np.clip(x_min, 0.0, TARGET_SIZE - 1.0)
+    y_min = np.clip(y_min, 0.0, TARGET_SIZE - 1.0)
+    w_new = np.minimum(np.maximum(w_new, 1.0), TARGET_SIZE - x_min)
+    h_new = np.minimum(np.maximum(h_new, 1.0), TARGET_SIZE - y_min)
+
+    out = np.rint(np.stack([x_min, y_min, w_new, h_new], axis=1)).astype(int)
+
+    for fname in valid_names[degenerate]:
+        logger.error("S2B: Transform failed for '%s'.", fname)
+
+    # Assemble final integer values (failed rows keep their raw bbox,
+    # matching the old behaviour) and stream them out with the csv
+    # module — no per-cell df.at writes and no to_csv pass.
+    final = df_bbox[bbox_cols].to_numpy(dtype=np.int64, copy=True)
+    good_pos = np.flatnonzero(valid)[~degenerate]
+    final[good_pos] = out[~degenerate]
+
+    n_ok = len(good_pos)
+    n_fail = n_total - n_ok
 
     # Write updated bbox CSV into S2 output directory
-    df_bbox.to_csv(OUT_BBOX_CSV, index=False)
+    with open(OUT_BBOX_CSV, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow([bbox_id_col] + bbox_cols)
+        writer.writerows(zip(fnames.to_numpy(), *final.T.tolist()))
 
     logger.info("S2B: Completed. OK=%d FAIL=%d TOTAL=%d", n_ok, n_fail, n_total)
     logger.info("S2B: Output written: %s", OUT_BBOX_CSV)
@@ -11,7 +11,7 @@ from src.s1_data.utils.fs import (
     load_metadata_frames,
 )
 
-from src.s2_align.utils.image_checks import check_image_geometry
+from src.s2_align.utils.image_checks import check_image_geometry, load_image_geometry
 from src.s2_align.utils.landmark_checks import check_landmarks
 from src.s2_align.utils.bbox_checks import check_bboxes
 from src.s2_align.utils.summary import log_alignment_summary
@@ -128,7 +128,8 @@ def run(config):
     # ------------------------------------------------------------
     total = len(image_filenames)
     sample_size = min(250, total)
-    sample_list = random.sample(sorted(list(image_filenames)), sample_size)
+    # No need to sort 200k names just to draw a random sample
+    sample_list = random.sample(list(image_filenames), sample_size)
 
     logger.info(
         "S2: Sampling %d images (out of %d) for QC.",
@@ -148,11 +149,20 @@ def run(config):
     # ------------------------------------------------------------
     # GEOMETRY CHECK
     # ------------------------------------------------------------
+    # One header-only pass over the sample; the landmark and bbox checks
+    # reuse these dimensions instead of reopening the same files.
+    geometry = load_image_geometry(image_dir, sample_list)
+    if geometry is None:
+        logger.error("S2: Geometry verification failed.")
+        raise SystemExit(1)
+    sizes = {fname: (w, h) for fname, (w, h, _) in geometry.items()}
+
     ok_geometry = check_image_geometry(
         image_dir=image_dir,
         samples=sample_list,
         expected_w=expected_w,
         expected_h=expected_h,
+        geometry=geometry,
     )
     if not ok_geometry:
         logger.error("S2: Geometry verification failed.")
@@ -167,6 +177,7 @@ def run(config):
         df_landmarks=landmarks_df,
         expected_w=expected_w,
         expected_h=expected_h,
+        sizes=sizes,
     )
     if not ok_landmarks:
         logger.error("S2: Landmark verification failed.")
@@ -181,6 +192,7 @@ def run(config):
         df_bbox=bbox_df,
         expected_w=expected_w,
         expected_h=expected_h,
+        sizes=sizes,
     )
 
     if not ok_bboxes:
@@ -200,6 +212,7 @@ def run(config):
             df_bbox=bbox_df,
             expected_w=expected_w,
             expected_h=expected_h,
+            sizes=sizes,
         )
 
         if not ok_bboxes:
@@ -6,37 +6,53 @@ from src.utils.logging import get_logger
 logger = get_logger("S2_BBOX")
 
 
-def _extract_bbox(df, fname):
-    """Extract bounding-box row for filename."""
+def _bbox_table(df):
+    """Build a filename -> row-index map plus the bbox value matrix.
+
+    One pass over the frame; per-sample lookups are then O(1) instead of
+    a full-column string compare per filename.
+    """
     id_col = df.columns[0]
-    row = df[df[id_col].astype(str) == str(fname)]
-    if row.empty:
-        return None
+    idx_map = {fn: i for i, fn in enumerate(df[id_col].astype(str))}
     # Bbox columns: x, y, w, h
-    vals = row.values[0][1:]
-    return tuple(int(v) for v in vals)
+    values = df.iloc[:, 1:].to_numpy(dtype=int)
+    return idx_map, values
+
+
+def _extract_bbox(idx_map, values, fname):
+    """Extract bounding box for filename. Returns None if missing."""
+    i = idx_map.get(str(fname))
+    if i is None:
+        return None
+    return tuple(int(v) for v in values[i])
+
 
+def check_bboxes(image_dir, samples, df_bbox, expected_w, expected_h, sizes=None):
+    """Check bbox geometry relative to aligned image bounds and expected dimensions.
 
-def check_bboxes(image_dir, samples, df_bbox, expected_w, expected_h):
-    """Check bbox geometry relative to aligned image bounds and expected dimensions."""
+    sizes may carry fname -> (w, h) from a prior geometry pass; otherwise
+    only the image header is parsed (no pixel decode).
+    """
     bad = 0
+    idx_map, values = _bbox_table(df_bbox)
 
     for fname in samples:
-        bbox = _extract_bbox(df_bbox, fname)
+        bbox = _extract_bbox(idx_map, values, fname)
         if bbox is None:
             logger.error("S2: Missing bbox row for '%s'.", fname)
             return False
 
         x, y, w, h = bbox
 
-        path = os.path.join(image_dir, fname)
-        try:
-            img = Image.open(path).convert("RGB")
-        except Exception as e:
-            logger.error("S2: Failed to read '%s' for bbox check: %s", fname, e)
-            return False
-
-        W, H = img.size
+        if sizes is not None:
+            W, H = sizes[fname]
+        else:
+            path = os.path.join(image_dir, fname)
+            try:
+                W, H = Image.open(path).size
+            except Exception as e:
+                logger.error("S2: Failed to read '%s' for bbox check: %s", fname, e)
+                return False
 
         if W != expected_w or H != expected_h:
             bad += 1
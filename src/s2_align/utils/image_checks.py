@@ -1,4 +1,6 @@
 import os
+import struct
+
 from PIL import Image
 
 from src.utils.logging import get_logger
@@ -6,25 +8,92 @@ from src.utils.logging import get_logger
 logger = get_logger("S2_IMAGE")
 
 
-def check_image_geometry(image_dir, samples, expected_w, expected_h):
+# Start-of-frame markers carrying the image dimensions (baseline,
+# progressive, and the arithmetic/differential variants).
+_SOF_MARKERS = {
+    0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+    0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF,
+}
+
+
+def _jpeg_header_shape(path):
+    """Read (w, h, channels) straight from the JPEG SOF segment.
+
+    A short marker walk over the first few hundred bytes; no PIL plugin
+    dispatch or decoder setup. Returns None if the file is not a JPEG or
+    the header is malformed (callers fall back to PIL).
+    """
+    try:
+        with open(path, "rb") as f:
+            if f.read(2) != b"\xff\xd8":
+                return None
+            while True:
+                b = f.read(2)
+                if len(b) < 2 or b[0] != 0xFF:
+                    return None
+                marker = b[1]
+                # Skip fill bytes and standalone markers
+                while marker == 0xFF:
+                    nxt = f.read(1)
+                    if not nxt:
+                        return None
+                    marker = nxt[0]
+                if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+                    continue
+                seg = f.read(2)
+                if len(seg) < 2:
+                    return None
+                length = struct.unpack(">H", seg)[0]
+                if marker in _SOF_MARKERS:
+                    data = f.read(7)
+                    if len(data) < 7:
+                        return None
+                    h, w = struct.unpack(">HH", data[1:5])
+                    return w, h, data[5]
+                f.seek(length - 2, os.SEEK_CUR)
+    except OSError:
+        return None
+
+
+def load_image_geometry(image_dir, samples):
+    """Read (w, h, channels) for each sampled image from the headers.
+
+    Image.open parses only the header — no pixel decode — so this is one
+    cheap pass whose result every QC check can share instead of each
+    reopening (and decoding) the same files.
+    Returns a dict fname -> (w, h, channels), or None on a read failure.
+    """
+    geometry = {}
+    for fname in samples:
+        path = os.path.join(image_dir, fname)
+        shape = _jpeg_header_shape(path)
+        if shape is None:
+            try:
+                img = Image.open(path)
+            except Exception as e:
+                logger.error("S2: Failed to read '%s': %s", path, e)
+                return None
+            shape = (*img.size, len(img.getbands()))
+        geometry[fname] = shape
+    return geometry
+
+
+def check_image_geometry(image_dir, samples, expected_w, expected_h, geometry=None):
     """Verify that sampled aligned images satisfy expected geometry:
     - width matches expected_w
     - height matches expected_h
     - exactly 3 channels
     """
+    if geometry is None:
+        geometry = load_image_geometry(image_dir, samples)
+        if geometry is None:
+            return False
+
     ok = True
     bad_samples = []
 
     for fname in samples:
-        path = os.path.join(image_dir, fname)
-        try:
-            img = Image.open(path)
-        except Exception as e:
-            logger.error("S2: Failed to read '%s': %s", path, e)
-            return False
-
-        w, h = img.size
-        channels = len(img.getbands())
+        w, h, channels = geometry[fname]
 
         if w != expected_w or h != expected_h or channels != 3:
             ok = False
@@ -47,9 +116,3 @@ def check_image_geometry(image_dir, samples, expected_w, expected_h):
         expected_w, expected_h
     )
     return True
-
-    logger.info(
-        "S2: All sampled images match expected geometry %dx%d with 3 channels.",
-        expected_w, expected_h
-    )
-    return True
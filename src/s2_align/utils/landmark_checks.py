@@ -7,50 +7,69 @@ from src.utils.logging import get_logger
 logger = get_logger("S2_LANDMARK")
 
 
-def _extract_landmarks(df, fname):
-    """Extract landmark row for filename. Returns None if missing."""
+def _landmark_table(df):
+    """Build a filename -> row-index map plus the landmark value matrix.
+
+    One pass over the frame; per-sample lookups are then O(1) instead of
+    a full-column string compare per filename.
+    """
     id_col = df.columns[0]
-    row = df[df[id_col].astype(str) == str(fname)]
-    if row.empty:
-        return None
+    idx_map = {fn: i for i, fn in enumerate(df[id_col].astype(str))}
     # Landmarks are 10 columns: l_eye_x, l_eye_y, r_eye_x, r_eye_y, nose_x, ...
-    values = row.values[0][1:]
-    return np.array(values, dtype=float).reshape(-1, 2)
+    values = df.iloc[:, 1:].to_numpy(dtype=float)
+    return idx_map, values
 
 
-def check_landmarks(image_dir, samples, df_landmarks, expected_w, expected_h):
-    """Check that landmarks lie inside image bounds and image dims match expected geometry."""
-    bad = 0
+def check_landmarks(image_dir, samples, df_landmarks, expected_w, expected_h, sizes=None):
+    """Check that landmarks lie inside image bounds and image dims match expected geometry.
+
+    sizes may carry fname -> (w, h) from a prior geometry pass; otherwise
+    only the image header is parsed (no pixel decode).
+    """
+    idx_map, values = _landmark_table(df_landmarks)
 
+    rows = []
     for fname in samples:
-        lm = _extract_landmarks(df_landmarks, fname)
-        if lm is None:
+        i = idx_map.get(str(fname))
+        if i is None:
             logger.error("S2: Missing landmarks row for '%s'.", fname)
             return False
+        rows.append(i)
 
-        path = os.path.join(image_dir, fname)
-        try:
-            img = Image.open(path).convert("RGB")
-        except Exception as e:
-            logger.error("S2: Failed to read '%s' for landmark check: %s", fname, e)
-            return False
+    if sizes is not None:
+        wh = np.array([sizes[fname] for fname in samples], dtype=float)
+    else:
+        dims = []
+        for fname in samples:
+            path = os.path.join(image_dir, fname)
+            try:
+                dims.append(Image.open(path).size)
+            except Exception as e:
+                logger.error("S2: Failed to read '%s' for landmark check: %s", fname, e)
+                return False
+        wh = np.array(dims, dtype=float)
 
-        w, h = img.size
+    # One (S, 5, 2) comparison covers every sampled landmark; the loop
+    # below only formats log lines for failures.
+    lm = values[rows].reshape(len(samples), -1, 2)
+    size_ok = (wh[:, 0] == expected_w) & (wh[:, 1] == expected_h)
+    in_bounds = (
+        (lm[:, :, 0] >= 0) & (lm[:, :, 0] < wh[:, None, 0])
+        & (lm[:, :, 1] >= 0) & (lm[:, :, 1] < wh[:, None, 1])
+    ).all(axis=1)
 
-        if w != expected_w or h != expected_h:
-            bad += 1
-            if bad <= 10:
-                logger.error(
-                    "S2: Image '%s' size %dx%d does not match expected %dx%d.",
-                    fname, w, h, expected_w, expected_h
-                )
+    bad = 0
+    for j in np.flatnonzero(~(size_ok & in_bounds)):
+        bad += 1
+        if bad > 10:
             continue
-
-        if not ((lm[:, 0] >= 0).all() and (lm[:, 0] < w).all() and
-                (lm[:, 1] >= 0).all() and (lm[:, 1] < h).all()):
-            bad += 1
-            if bad <= 10:
-                logger.error("S2: Landmarks for '%s' fall outside image bounds.", fname)
+        if not size_ok[j]:
+            logger.error(
+                "S2: Image '%s' size %dx%d does not match expected %dx%d.",
+                samples[j], int(wh[j, 0]), int(wh[j, 1]), expected_w, expected_h
+            )
+        else:
+            logger.error("S2: Landmarks for '%s' fall outside image bounds.", samples[j])
 
     if bad > 0:
         logger.error("S2: %d sampled images have out-of-bounds landmarks.", bad)
@@ -4,12 +4,31 @@ from typing import Dict, Optional
 import numpy as np
 from PIL import Image, ImageFilter
 
+try:
+    import cv2
+except ImportError:  # pragma: no cover - cv2 ships with the pipeline env
+    cv2 = None
+
+# Optional libjpeg-turbo bindings for the jpeg preset; instantiating
+# TurboJPEG can fail even when the module imports (missing native lib),
+# hence the broad guard.
+try:
+    from turbojpeg import TurboJPEG
+    _tj = TurboJPEG()
+except Exception:
+    _tj = None
+
 from src.utils.logging import get_logger
 
 logger = get_logger("S3_DEG")
 
 
-def apply_degradation(img: Image.Image, preset: Dict, output_size: Optional[int]) -> Image.Image:
+def apply_degradation(
+    img: Image.Image,
+    preset: Dict,
+    output_size: Optional[int],
+    rng: Optional[np.random.Generator] = None,
+) -> Image.Image:
     """
     Apply a single degradation preset to a PIL image and optionally enforce output_size×output_size.
 
@@ -17,27 +36,57 @@ def apply_degradation(img: Image.Image, preset: Dict, output_size: Optional[int]
         - "gaussian_blur": uses preset["sigma"] as blur radius
         - "jpeg": uses preset["quality"] as JPEG quality
         - "gaussian_noise": uses preset["sigma"] as pixel-wise stddev in [0,255] space
+
+    rng supplies the noise Generator (callers seed it per file for
+    reproducibility); an unseeded one is created when omitted.
     """
     preset_type = preset.get("type")
     name = preset.get("name", "<unnamed>")
 
     if preset_type == "gaussian_blur":
         sigma = float(preset["sigma"])
-        img_out = img.filter(ImageFilter.GaussianBlur(radius=sigma))
+        if cv2 is not None:
+            # OpenCV's separable Gaussian runs on SIMD kernels; PIL's
+            # triple box-filter approximation is the slow path here.
+            k = max(3, int(2 * round(3 * sigma) + 1))
+            arr = cv2.GaussianBlur(
+                np.asarray(img), (k, k), sigmaX=sigma,
+                borderType=cv2.BORDER_REFLECT,
+            )
+            img_out = Image.fromarray(arr)
+        else:
+            img_out = img.filter(ImageFilter.GaussianBlur(radius=sigma))
 
     elif preset_type == "jpeg":
         quality = int(preset["quality"])
-        buf = io.BytesIO()
-        img.save(buf, format="JPEG", quality=quality, optimize=True)
-        buf.seek(0)
-        img_out = Image.open(buf).convert("RGB")
+        if _tj is not None:
+            # Round-trip on libjpeg-turbo's SIMD encode/decode, straight
+            # from/to numpy. TurboJPEG works in BGR order.
+            arr = np.ascontiguousarray(np.asarray(img)[:, :, ::-1])
+            jpeg_bytes = _tj.encode(arr, quality=quality)
+            arr_out = np.ascontiguousarray(_tj.decode(jpeg_bytes)[:, :, ::-1])
+            img_out = Image.fromarray(arr_out)
+        else:
+            buf = io.BytesIO()
+            # No optimize=True: two-pass Huffman only shrinks the file,
+            # the decoded pixels (the artifact we want) are identical.
+            img.save(buf, format="JPEG", quality=quality)
+            buf.seek(0)
+            img_out = Image.open(buf).convert("RGB")
 
     elif preset_type == "gaussian_noise":
         sigma = float(preset["sigma"])
-        arr = np.array(img).astype(np.float32)
-        noise = np.random.normal(loc=0.0, scale=sigma, size=arr.shape).astype(np.float32)
-        arr_noisy = np.clip(arr + noise, 0.0, 255.0).astype(np.uint8)
-        img_out = Image.fromarray(arr_noisy)
+        if rng is None:
+            rng = np.random.default_rng()
+        # PCG64 standard_normal draws float32 directly; scaling, add and
+        # clip all run in place, so only two full-size buffers exist
+        # instead of the old float64 normal + sum + clip chain.
+        arr = np.asarray(img, dtype=np.float32)
+        noise = rng.standard_normal(arr.shape, dtype=np.float32)
+        noise *= sigma
+        arr += noise
+        np.clip(arr, 0.0, 255.0, out=arr)
+        img_out = Image.fromarray(arr.astype(np.uint8))
 
     else:
         raise ValueError(f"S3: Unsupported degradation type '{preset_type}' for preset '{name}'")
@@ -1,17 +1,23 @@
 import os
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 import pandas as pd
+from PIL import Image
 
 from src.utils.logging import get_logger
 from src.s4_codeformer.utils.io import (
     ensure_dir,
     read_manifest_csv,
+    gpu_jpeg_decode_available,
+    load_image_gpu,
     load_image_rgb,
     save_image_jpeg,
     count_existing,
 )
-from src.s4_codeformer.utils.model import load_codeformer, run_codeformer
+from src.s4_codeformer.utils.model import load_codeformer, run_codeformer_batch
+
+# Images per forward pass; also the prefetch granularity for the loader
+BATCH_SIZE = 16
 
 
 def run(config):
@@ -51,23 +57,34 @@ def run(config):
         .get("codeformer_fidelity_w", [0.5])
     )
 
-    model = load_codeformer(ckpt_name=ckpt_name)
+    force_rerun = bool(cfg_cf.get("force_rerun", False))
+    save_quality = int(cfg_cf.get("save_quality", 95))
+
+    model = load_codeformer(
+        ckpt_name=ckpt_name,
+        compile_net=bool(cfg_cf.get("compile", True)),
+    )
     if model is None:
         logger.error("S4B: CodeFormer dependencies missing or checkpoint not found.")
         raise SystemExit(1)
 
     logger.info("S4B: Fidelity sweep will run on w values: %s", fidelity_grid)
 
+    load_fn = load_image_rgb
+    if model["device"] == "cuda" and gpu_jpeg_decode_available():
+        load_fn = load_image_gpu
+        logger.info("S4B: Decoding JPEGs on the GPU via nvJPEG.")
+
     # ------------------------------------------------------------------
     # Group by degradation preset
     # ------------------------------------------------------------------
-    by_preset = defaultdict(list)
-    for row in df.itertuples(index=False):
-        by_preset[getattr(row, "degradation")].append(row)
+    # groupby keeps the manifest columnar — no per-row namedtuple
+    # materialization just to route rows to their preset bucket.
+    groups = df.groupby("degradation", sort=False)
 
     logger.info(
         "S4B: Inference will run over %d presets. Total samples: %d.",
-        len(by_preset),
+        groups.ngroups,
         total_rows,
     )
 
@@ -78,13 +95,22 @@ def run(config):
     processed_total = 0
     target_total = total_rows * max(len(fidelity_grid), 1)
 
-    for preset, rows in by_preset.items():
-        logger.info("S4B: Processing preset '%s' with %d images.", preset, len(rows))
+    for preset, sub in groups:
+        ids = sub["id"].to_numpy()
+        path_gts = sub["path_gt"].to_numpy()
+        path_degs = sub["path_deg"].to_numpy()
+        splits = sub["split"].to_numpy()
+        n_preset = len(ids)
+        logger.info("S4B: Processing preset '%s' with %d images.", preset, n_preset)
 
+        # One decode per image for the whole fidelity sweep: the w-loop
+        # sits inside the batch loop, so each JPEG is decoded (and, on
+        # CUDA, uploaded) once and reused for every fidelity value.
+        sweep = []
         for w in fidelity_grid:
             out_dir = os.path.join(outputs_root, preset, f"w_{w}", "imgs")
+            out_prefix = out_dir + os.sep
             ensure_dir(out_dir)
-
             logger.info(
                 "S4B: Preset '%s' | fidelity w=%s -> %s",
                 preset,
@@ -92,57 +118,137 @@ def run(config):
                 out_dir,
             )
 
-            for row in rows:
-                image_id = getattr(row, "id")
-                path_gt = getattr(row, "path_gt")
-                path_deg = getattr(row, "path_deg")
-                split = int(getattr(row, "split"))
+            # Resumable runs: one directory scan marks outputs that are
+            # already present and non-trivially sized; those rows go
+            # straight to the manifest without touching the model.
+            done = set()
+            if not force_rerun:
+                with os.scandir(out_dir) as it:
+                    done = {e.name for e in it if e.stat().st_size > 1024}
+            sweep.append((w, out_prefix, done))
 
-                # Load degraded input
-                try:
-                    img_in = load_image_rgb(path_deg)
-                except Exception as e:
-                    logger.error("S4B: Failed to load degraded '%s': %s", path_deg, e)
-                    continue
-
-                # Model inference
-                try:
-                    restored = run_codeformer(model, img_in, fidelity=w)
-                except Exception as e:
-                    logger.error("S4B: CodeFormer failed on '%s': %s", path_deg, e)
-                    continue
-
-                # Save output
-                path_restored = os.path.join(out_dir, image_id)
-                try:
-                    save_image_jpeg(restored, path_restored, quality=95)
-                except Exception as e:
-                    logger.error("S4B: Save failed '%s': %s", path_restored, e)
+            n_skipped = 0
+            for j in range(n_preset):
+                if ids[j] not in done:
                     continue
-
-                # Record manifest row
+                n_skipped += 1
+                path_restored = out_prefix + ids[j]
+                # Header-only open; no pixel decode.
+                with Image.open(path_restored) as im:
+                    rw, rh = im.size
                 manifest_rows.append(
                     {
                         "method": "codeformer",
-                        "id": image_id,
-                        "path_gt": path_gt,
-                        "path_deg": path_deg,
+                        "id": ids[j],
+                        "path_gt": path_gts[j],
+                        "path_deg": path_degs[j],
                         "path_restored": path_restored,
                         "degradation": preset,
-                        "split": split,
+                        "split": int(splits[j]),
                         "w": w,
-                        "restored_w": restored.width,
-                        "restored_h": restored.height,
+                        "restored_w": rw,
+                        "restored_h": rh,
                     }
                 )
+            if n_skipped:
+                logger.info(
+                    "S4B: Preset '%s' w=%s: skipping %d already-restored images.",
+                    preset, w, n_skipped,
+                )
+                processed_total += n_skipped
+
+        # An image is decoded if at least one fidelity value still needs it.
+        todo = [
+            j for j in range(n_preset)
+            if any(ids[j] not in done for _, _, done in sweep)
+        ]
+
+        def _load_batch(start):
+            loaded = []
+            for j in todo[start:start + BATCH_SIZE]:
+                try:
+                    loaded.append((j, load_fn(path_degs[j]), None))
+                except Exception as e:
+                    loaded.append((j, None, e))
+            return loaded
+
+        starts = list(range(0, len(todo), BATCH_SIZE))
+
+        # Double-buffered loading: while the model runs batch i, the
+        # loader thread decodes batch i+1.
+        with ThreadPoolExecutor(max_workers=1) as loader:
+            next_fut = loader.submit(_load_batch, starts[0]) if starts else None
+            for bi in range(len(starts)):
+                loaded = next_fut.result()
+                next_fut = (
+                    loader.submit(_load_batch, starts[bi + 1])
+                    if bi + 1 < len(starts) else None
+                )
+
+                good_idx, imgs = [], []
+                for j, img_in, err in loaded:
+                    if img_in is None:
+                        logger.error(
+                            "S4B: Failed to load degraded '%s': %s",
+                            path_degs[j], err,
+                        )
+                        continue
+                    good_idx.append(j)
+                    imgs.append(img_in)
+                if not imgs:
+                    continue
+
+                for w, out_prefix, done in sweep:
+                    sel = [
+                        (j, img) for j, img in zip(good_idx, imgs)
+                        if ids[j] not in done
+                    ]
+                    if not sel:
+                        continue
+
+                    # Model inference on the whole sub-batch
+                    try:
+                        restored_batch = run_codeformer_batch(
+                            model, [img for _, img in sel], fidelity=w
+                        )
+                    except Exception as e:
+                        logger.error(
+                            "S4B: CodeFormer failed on a batch of %d (preset '%s', w=%s): %s",
+                            len(sel), preset, w, e,
+                        )
+                        continue
+
+                    for (j, _), restored in zip(sel, restored_batch):
+                        image_id = ids[j]
+                        path_restored = out_prefix + image_id
+                        try:
+                            save_image_jpeg(restored, path_restored, quality=save_quality)
+                        except Exception as e:
+                            logger.error("S4B: Save failed '%s': %s", path_restored, e)
+                            continue
+
+                        manifest_rows.append(
+                            {
+                                "method": "codeformer",
+                                "id": image_id,
+                                "path_gt": path_gts[j],
+                                "path_deg": path_degs[j],
+                                "path_restored": path_restored,
+                                "degradation": preset,
+                                "split": int(splits[j]),
+                                "w": w,
+                                "restored_w": restored.width,
+                                "restored_h": restored.height,
+                            }
+                        )
 
-                processed_total += 1
-                if processed_total % 1000 == 0:
-                    logger.info(
-                        "S4B: Processed %d / %d total samples...",
-                        processed_total,
-                        target_total,
-                    )
+                        processed_total += 1
+                        if processed_total % 1000 == 0:
+                            logger.info(
+                                "S4B: Processed %d / %d total samples...",
+                                processed_total,
+                                target_total,
+                            )
 
         logger.info("S4B: Finished preset '%s'.", preset)
 
@@ -4,22 +4,73 @@ from typing import Iterable
 import pandas as pd
 from PIL import Image, UnidentifiedImageError
 
+try:
+    import cv2
+except ImportError:  # pragma: no cover - cv2 is in requirements
+    cv2 = None
+
 
 def ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
 
+_MANIFEST_COLS = ["id", "path_gt", "path_deg", "degradation", "split"]
+
+
 def read_manifest_csv(path: str) -> pd.DataFrame:
     if not os.path.isfile(path):
         raise FileNotFoundError(f"S4B: S3 manifest not found: {path}")
-    df = pd.read_csv(path)
-    required = {"id", "path_gt", "path_deg", "degradation", "split"}
-    missing = required - set(df.columns)
+    try:
+        # pyarrow parses in parallel and backs string columns with
+        # zero-copy arrow buffers — much lighter than object dtype on a
+        # 600k-row manifest.
+        df = pd.read_csv(
+            path,
+            engine="pyarrow",
+            dtype_backend="pyarrow",
+            usecols=_MANIFEST_COLS,
+        )
+    except (ImportError, ValueError):
+        # pyarrow not installed, or a required column is absent — plain
+        # read; the check below reports which columns are missing.
+        df = pd.read_csv(path)
+    missing = set(_MANIFEST_COLS) - set(df.columns)
     if missing:
         raise ValueError(f"S4B: Manifest missing columns: {sorted(list(missing))}")
     return df
 
 
+def gpu_jpeg_decode_available() -> bool:
+    """True when torchvision's nvJPEG-backed decode_jpeg can run on CUDA."""
+    try:
+        import torch
+        from torchvision.io import decode_jpeg  # noqa: F401
+    except ImportError:
+        return False
+    return torch.cuda.is_available()
+
+
+def load_image_gpu(path: str):
+    """Decode a JPEG straight onto the GPU via nvJPEG.
+
+    Returns a uint8 (3, H, W) CUDA tensor — the PIL decode and the
+    host-to-device pixel copy both disappear; only the compressed bytes
+    cross the bus.
+    """
+    import torch
+    from torchvision.io import ImageReadMode, decode_jpeg
+
+    try:
+        with open(path, "rb") as f:
+            raw = torch.frombuffer(f.read(), dtype=torch.uint8)
+    except OSError as e:
+        raise RuntimeError(f"S4B: Failed to read image bytes: {path}: {e}") from e
+    try:
+        return decode_jpeg(raw, mode=ImageReadMode.RGB, device="cuda")
+    except RuntimeError as e:
+        raise RuntimeError(f"S4B: GPU JPEG decode failed: {path}: {e}") from e
+
+
 def load_image_rgb(path: str) -> Image.Image:
     if not os.path.isfile(path):
         raise RuntimeError(f"S4B: Missing input image file: {path}")
@@ -28,14 +79,22 @@ def load_image_rgb(path: str) -> Image.Image:
     if size_bytes <= 0:
         raise RuntimeError(f"S4B: Zero-byte input image: {path}")
 
-    try:
-        with Image.open(path) as im:
-            im.load()
-            img = im.convert("RGB")
-    except UnidentifiedImageError as e:
-        raise RuntimeError(f"S4B: Unidentified image file: {path}: {e}") from e
-    except Exception as e:
-        raise RuntimeError(f"S4B: Failed to decode image: {path}: {e}") from e
+    if cv2 is not None:
+        # cv2.imread goes straight to libjpeg-turbo's SIMD decoder
+        # without PIL's Python-level framing.
+        arr = cv2.imread(path, cv2.IMREAD_COLOR)
+        if arr is None:
+            raise RuntimeError(f"S4B: Failed to decode image: {path}")
+        img = Image.fromarray(cv2.cvtColor(arr, cv2.COLOR_BGR2RGB))
+    else:
+        try:
+            with Image.open(path) as im:
+                im.load()
+                img = im.convert("RGB")
+        except UnidentifiedImageError as e:
+            raise RuntimeError(f"S4B: Unidentified image file: {path}: {e}") from e
+        except Exception as e:
+            raise RuntimeError(f"S4B: Failed to decode image: {path}: {e}") from e
 
     w, h = img.size
     if w <= 0 or h <= 0:
@@ -46,7 +105,18 @@ def load_image_rgb(path: str) -> Image.Image:
 
 def save_image_jpeg(img: Image.Image, path: str, quality: int = 95) -> None:
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    img.save(path, format="JPEG", quality=quality, optimize=True)
+    # Single-pass baseline encode: optimize=True costs a second full
+    # pass over the scan data for ~2% smaller files, and 4:4:4
+    # subsampling keeps restoration detail intact.
+    img.save(
+        path,
+        format="JPEG",
+        quality=quality,
+        optimize=False,
+        progressive=False,
+        subsampling=0,
+        icc_profile=None,
+    )
 
 
 def count_existing(paths: Iterable[str]) -> int:
@@ -1,3 +1,4 @@
+import functools
 import os
 import sys
 import importlib.util
@@ -17,6 +18,7 @@ logger = get_logger("S4B_MODEL")
 # ---------------------------------------------------------------------
 
 
+@functools.lru_cache(maxsize=None)
 def _project_root() -> Path:
     """
     project/
@@ -29,6 +31,7 @@ def _project_root() -> Path:
     return Path(__file__).resolve().parents[3]
 
 
+@functools.lru_cache(maxsize=None)
 def _codeformer_repo() -> Path:
     root = _project_root()
     repo = root / "CodeFormer"
@@ -45,6 +48,7 @@ def _codeformer_repo() -> Path:
 # ---------------------------------------------------------------------
 
 
+@functools.lru_cache(maxsize=None)
 def _candidate_weight_paths(ckpt_name: str) -> List[Path]:
     """
     Search order:
@@ -76,6 +80,7 @@ def _candidate_weight_paths(ckpt_name: str) -> List[Path]:
     return paths
 
 
+@functools.lru_cache(maxsize=None)
 def _resolve_weights(ckpt_name: str) -> Path:
     for p in _candidate_weight_paths(ckpt_name):
         if p.is_file():
@@ -97,6 +102,9 @@ def _resolve_weights(ckpt_name: str) -> Path:
 # ---------------------------------------------------------------------
 
 
+_BASICSR_BOUND = False
+
+
 def _import_codeformer_basicsr() -> None:
     """
     Hard-bind the CodeFormer-local basicsr as the *only* 'basicsr' package
@@ -105,10 +113,22 @@ def _import_codeformer_basicsr() -> None:
     This completely ignores / replaces any pip-installed 'basicsr', so S4A
     (GFPGAN) can safely use its own pip basicsr in a separate run.
     """
+    # O(1) fast exit once we have bound successfully — no path
+    # construction, no sys.modules scan.
+    global _BASICSR_BOUND
+    if _BASICSR_BOUND and "basicsr" in sys.modules:
+        return
+
     repo = _codeformer_repo()
     basicsr_dir = repo / "basicsr"
     init_py = basicsr_dir / "__init__.py"
 
+    # Already bound to this exact tree? Nothing to purge or re-exec.
+    bound = sys.modules.get("basicsr")
+    if bound is not None and getattr(bound, "__file__", None) == str(init_py):
+        _BASICSR_BOUND = True
+        return
+
     if not init_py.is_file():
         raise FileNotFoundError(
             f"S4B: basicsr/__init__.py not found under {basicsr_dir} "
@@ -136,14 +156,30 @@ def _import_codeformer_basicsr() -> None:
     assert spec.loader is not None
     spec.loader.exec_module(module)
 
+    _BASICSR_BOUND = True
     logger.info("S4B: Using CodeFormer basicsr from %s", basicsr_dir)
 
 
+_IMPORT_OK: Optional[bool] = None
+
+
 def _try_imports() -> bool:
     """
     Return True if we can import torch + CodeFormer from the CodeFormer-local
     basicsr. False otherwise (and log a clear error).
+
+    The verdict is cached: repeat calls skip the sys.path / sys.modules
+    surgery entirely.
     """
+    global _IMPORT_OK
+    if _IMPORT_OK is not None:
+        return _IMPORT_OK
+
+    _IMPORT_OK = _try_imports_uncached()
+    return _IMPORT_OK
+
+
+def _try_imports_uncached() -> bool:
     try:
         _import_codeformer_basicsr()
     except Exception as e:
@@ -170,15 +206,32 @@ def _try_imports() -> bool:
 # ---------------------------------------------------------------------
 
 
-def _get_device() -> str:
-    try:
-        import torch
+_CUDA_AVAILABLE: Optional[bool] = None
+
 
-        if torch.cuda.is_available():
-            return "cuda"
-    except Exception:
-        pass
-    return "cpu"
+def _get_device() -> str:
+    # Cached: torch.cuda.is_available() is a driver query, too slow to
+    # repeat on every call.
+    global _CUDA_AVAILABLE
+    if _CUDA_AVAILABLE is None:
+        try:
+            import torch
+
+            _CUDA_AVAILABLE = bool(torch.cuda.is_available())
+            if _CUDA_AVAILABLE:
+                # is_available() only checks the driver; a tiny
+                # allocation proves the runtime actually initializes
+                # (e.g. driver present but torch built without support
+                # for this GPU).
+                torch.zeros(1, device="cuda")
+        except Exception as e:
+            if _CUDA_AVAILABLE:
+                logger.warning(
+                    "%s: CUDA reported available but failed to initialize "
+                    "(%s); falling back to CPU.", "S4B", e,
+                )
+            _CUDA_AVAILABLE = False
+    return "cuda" if _CUDA_AVAILABLE else "cpu"
 
 
 # ---------------------------------------------------------------------
@@ -188,6 +241,7 @@ def _get_device() -> str:
 
 def load_codeformer(
     ckpt_name: str = "codeformer-v0.1.0",
+    compile_net: bool = True,
 ) -> Optional[Dict[str, Any]]:
     """
     Returns a dict with:
@@ -208,60 +262,170 @@ def load_codeformer(
 
     logger.info("S4B: Building CodeFormer model on device '%s'.", device)
 
-    net = CodeFormer(
-        dim_embd=512,
-        n_head=8,
-        n_layers=9,
-        codebook_size=1024,
-    )
-
-
+    # Meta-device construction + mmap'd checkpoint: parameters come
+    # straight from the file-backed tensors via assign=True, instead of
+    # being allocated empty, overwritten from a fully-read checkpoint,
+    # then moved again. Big win for cold-start time and peak RSS.
+    use_meta = True
+    try:
+        with torch.device("meta"):
+            net = CodeFormer(
+                dim_embd=512,
+                n_head=8,
+                n_layers=9,
+                codebook_size=1024,
+            )
+    except (RuntimeError, TypeError):
+        use_meta = False
+        net = CodeFormer(
+            dim_embd=512,
+            n_head=8,
+            n_layers=9,
+            codebook_size=1024,
+        )
 
-    ckpt = torch.load(model_path, map_location=device)
+    try:
+        ckpt = torch.load(model_path, map_location="cpu", mmap=True)
+    except TypeError:
+        # torch < 2.1 has no mmap kwarg
+        ckpt = torch.load(model_path, map_location="cpu")
 
     if "params_ema" in ckpt:
         state = ckpt["params_ema"]
     elif "state_dict" in ckpt:
-        state = {k.replace("module.", ""): v for k, v in ckpt["state_dict"].items()}
+        # Only rebuild the dict when a DataParallel prefix is actually
+        # present; prefix slicing beats str.replace, which scans the
+        # whole key.
+        state = ckpt["state_dict"]
+        if any(k.startswith("module.") for k in state):
+            state = {
+                (k[7:] if k.startswith("module.") else k): v
+                for k, v in state.items()
+            }
     else:
         raise KeyError(
             "S4B: Unexpected CodeFormer checkpoint format "
             "(expected 'params_ema' or 'state_dict')."
         )
 
-    net.load_state_dict(state, strict=True)
+    if use_meta:
+        net.load_state_dict(state, strict=True, assign=True)
+    else:
+        net.load_state_dict(state, strict=True)
     net.eval()
     net.to(device)
 
+    # Inference-only dtype lowering: half the bytes moved per matmul.
+    # bf16 on Ampere+ (same exponent range as fp32, no overflow risk),
+    # fp16 otherwise; on CPU, dynamically quantize the transformer's
+    # Linear layers (attention qkv, FFN) to int8 instead.
+    dtype = torch.float32
+    if device == "cuda":
+        dtype = (
+            torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+        )
+        net = net.to(dtype=dtype)
+    else:
+        try:
+            net = torch.ao.quantization.quantize_dynamic(
+                net, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            logger.info("S4B: Dynamically quantized Linear layers to int8.")
+        except (RuntimeError, AttributeError) as e:
+            logger.warning("S4B: int8 quantization unavailable (%s); keeping fp32.", e)
+
+    # NHWC layout lets cuDNN pick Tensor-Core-friendly conv kernels in
+    # the encoder/decoder; harmless on CPU.
+    net = net.to(memory_format=torch.channels_last)
+
+    # Fixed-shape batches make Inductor + CUDA Graph capture pay off:
+    # the first forward compiles, the steady state runs with near-zero
+    # launch overhead.
+    if compile_net and device == "cuda" and hasattr(torch, "compile"):
+        try:
+            net = torch.compile(net, mode="reduce-overhead", fullgraph=False)
+            logger.info("S4B: Compiled CodeFormer with torch.compile.")
+        except Exception as e:
+            logger.warning("S4B: torch.compile failed (%s); running eager.", e)
+
     logger.info("S4B: CodeFormer weights loaded and model ready.")
-    return {"net": net, "device": device}
+    return {"net": net, "device": device, "dtype": dtype}
 
 
-def run_codeformer(model, img_pil, fidelity):
+def run_codeformer_batch(model, imgs_pil, fidelity):
+    """Run CodeFormer on a batch of PIL images in one forward pass.
+
+    One (B, 3, 512, 512) batch amortizes kernel launches and keeps the
+    transformer's matmuls dense; on CUDA the host buffer is pinned so
+    the transfer overlaps, and the pass runs under inference_mode with
+    autocast at the model's reduced dtype.
+    """
     import torch
-    from torchvision import transforms
+
     net = model["net"]
     device = model["device"]
-
-    orig_w, orig_h = img_pil.size
+    dtype = model.get("dtype", torch.float32)
     target_size = 512
 
-    if img_pil.size != (target_size, target_size):
-        img_in = img_pil.resize((target_size, target_size), Image.BICUBIC)
+    if imgs_pil and not isinstance(imgs_pil[0], Image.Image):
+        # Already-decoded uint8 (3, H, W) CUDA tensors from the nvJPEG
+        # path — normalize and resize on device, no host round trip.
+        orig_sizes = [(int(t.shape[2]), int(t.shape[1])) for t in imgs_pil]
+        parts = []
+        for t in imgs_pil:
+            xt = t.unsqueeze(0).float().div_(255.0)
+            if xt.shape[-2:] != (target_size, target_size):
+                xt = torch.nn.functional.interpolate(
+                    xt,
+                    size=(target_size, target_size),
+                    mode="bicubic",
+                    align_corners=False,
+                ).clamp_(0, 1)
+            parts.append(xt)
+        x = torch.cat(parts, dim=0).to(device, dtype=dtype, non_blocking=True)
     else:
-        img_in = img_pil
-
-    x = transforms.ToTensor()(img_in).unsqueeze(0).to(device)
+        orig_sizes = [img.size for img in imgs_pil]
+        arrs = []
+        for img in imgs_pil:
+            if img.size != (target_size, target_size):
+                img = img.resize((target_size, target_size), Image.BICUBIC)
+            arrs.append(np.asarray(img))
+
+        # Ship uint8 across the bus (a quarter of the float32 bytes);
+        # dtype conversion and the /255 normalize happen on device.
+        x = torch.from_numpy(np.stack(arrs))
+        if device == "cuda":
+            x = x.pin_memory().to(device, non_blocking=True)
+        else:
+            x = x.to(device)
+        x = (
+            x.permute(0, 3, 1, 2)
+            .to(dtype if device == "cuda" else torch.float32)
+            .div_(255.0)
+        )
+    x = x.to(memory_format=torch.channels_last)
 
-    with torch.no_grad():
-        out_tensor, _, _ = net(x, w=fidelity, adain=True)
+    with torch.inference_mode():
+        if device == "cuda":
+            with torch.autocast("cuda", dtype=dtype):
+                out_tensor, _, _ = net(x, w=fidelity, adain=True)
+        else:
+            out_tensor, _, _ = net(x, w=fidelity, adain=True)
 
     # out_tensor: (B,3,H,W)
-    out_tensor = out_tensor[0].clamp(0,1)
-    out_np = (out_tensor.permute(1,2,0).cpu().numpy() * 255).astype(np.uint8)
-    img_out = Image.fromarray(out_np, "RGB")
+    out = (
+        out_tensor.float().clamp_(0, 1).mul_(255).round_().byte()
+        .permute(0, 2, 3, 1).cpu().numpy()
+    )
 
-    if img_out.size != (orig_w, orig_h):
-        img_out = img_out.resize((orig_w, orig_h), Image.BICUBIC)
+    results = []
+    for arr, (orig_w, orig_h) in zip(out, orig_sizes):
+        img_out = Image.fromarray(arr, "RGB")
+        if img_out.size != (orig_w, orig_h):
+            img_out = img_out.resize((orig_w, orig_h), Image.BICUBIC)
+        results.append(img_out)
+    return results
 
-    return img_out
+
+def run_codeformer(model, img_pil, fidelity):
+    return run_codeformer_batch(model, [img_pil], fidelity)[0]
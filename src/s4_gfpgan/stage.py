@@ -1,9 +1,12 @@
 # src/s4_gfpgan/stage.py
 
 import os
-from collections import defaultdict
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 import pandas as pd
+from PIL import Image
 
 from src.utils.logging import get_logger
 from src.s4_gfpgan.utils.io import (
@@ -15,6 +18,9 @@ from src.s4_gfpgan.utils.io import (
 )
 from src.s4_gfpgan.utils.model import load_gfpgan, enhance_aligned_pil
 
+# Sliding window of decoded-ahead inputs kept in flight per preset
+PREFETCH = 32
+
 
 def run(config):
     logger = get_logger("S4A")
@@ -55,110 +61,166 @@ def run(config):
     # ------------------------------------------------------------------------------
     # Group by degradation preset for directory layout
     # ------------------------------------------------------------------------------
-    by_preset = defaultdict(list)
-    for row in df.itertuples(index=False):
-        # row has attributes matching column names
-        by_preset[getattr(row, "degradation")].append(row)
+    # groupby keeps the manifest columnar — no per-row namedtuple
+    # materialization just to route rows to their preset bucket.
+    groups = df.groupby("degradation", sort=False)
 
     logger.info(
         "S4A: Inference will run over %d presets. Total samples: %d.",
-        len(by_preset),
+        groups.ngroups,
         total_rows,
     )
 
     # ------------------------------------------------------------------------------
     # Per-preset inference
     # ------------------------------------------------------------------------------
-    manifest_rows = []
+    # Stream the manifest per preset: each group frame is appended to
+    # the CSV as soon as its saves are confirmed, so peak memory is one
+    # group, not the whole manifest.
+    cols = [
+        "method",
+        "id",
+        "path_gt",
+        "path_deg",
+        "path_restored",
+        "degradation",
+        "split",
+        "restored_w",
+        "restored_h",
+    ]
+    tmp_manifest = s4_manifest_path + ".tmp"
+    manifest_f = open(tmp_manifest, "w", newline="", encoding="utf-8")
+    rows_written = 0
+    restored_paths = []
     processed_total = 0
 
-    for preset, rows in by_preset.items():
+    # Three-stage pipeline: a thread pool decodes upcoming JPEGs and
+    # writes finished ones while the model runs — the encode/decode cost
+    # comes off the critical path. PIL/cv2 release the GIL for the heavy
+    # parts, so threads are enough.
+    pool = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+    for preset, sub in groups:
+        ids = sub["id"].to_numpy()
+        path_degs = sub["path_deg"].to_numpy()
+        n_preset = len(ids)
+
         out_dir = os.path.join(outputs_root, preset, "imgs")
         ensure_dir(out_dir)
+        # One C-level Series concat instead of os.path.join per row.
+        path_restoreds = (out_dir + os.sep + sub["id"]).to_numpy()
 
         logger.info(
             "S4A: Processing preset '%s' with %d images -> %s",
             preset,
-            len(rows),
+            n_preset,
             out_dir,
         )
 
-        for i, row in enumerate(rows, 1):
-            image_id = getattr(row, "id")
-            path_gt = getattr(row, "path_gt")
-            path_deg = getattr(row, "path_deg")
-            split = int(getattr(row, "split"))
+        # Idempotent resume: outputs already on disk (one scandir per
+        # preset, not one stat per row) skip load/infer/save entirely.
+        with os.scandir(out_dir) as it:
+            done = {e.name for e in it if e.stat().st_size > 0}
+        todo = [k for k in range(n_preset) if ids[k] not in done]
+
+        # (row position, save future) pairs, reconciled at preset end
+        pending_saves = []
+        restored_w = np.zeros(n_preset, dtype=np.int32)
+        restored_h = np.zeros(n_preset, dtype=np.int32)
+        ok = np.zeros(n_preset, dtype=bool)
+
+        n_skipped = n_preset - len(todo)
+        if n_skipped:
+            logger.info(
+                "S4A: Preset '%s': skipping %d already-restored images.",
+                preset, n_skipped,
+            )
+            for k in range(n_preset):
+                if ids[k] in done:
+                    # Header-only open; no pixel decode.
+                    with Image.open(path_restoreds[k]) as im:
+                        restored_w[k], restored_h[k] = im.size
+                    ok[k] = True
+            processed_total += n_skipped
+
+        load_futs = deque(
+            pool.submit(load_image_rgb, path_degs[k])
+            for k in todo[:PREFETCH]
+        )
+
+        for pos, k in enumerate(todo):
+            fut = load_futs.popleft()
+            if pos + PREFETCH < len(todo):
+                load_futs.append(
+                    pool.submit(load_image_rgb, path_degs[todo[pos + PREFETCH]])
+                )
 
-            # Load degraded input
+            # Load degraded input (decoded ahead of time)
             try:
-                img_in = load_image_rgb(path_deg)
+                img_in = fut.result()
             except Exception as e:
-                logger.error("S4A: Failed to load degraded '%s': %s", path_deg, e)
+                logger.error("S4A: Failed to load degraded '%s': %s", path_degs[k], e)
                 continue
 
             # Inference
             try:
                 img_restored = enhance_aligned_pil(restorer, img_in, enforce_size=None)
             except Exception as e:
-                logger.error("S4A: GFPGAN failed on '%s': %s", path_deg, e)
+                logger.error("S4A: GFPGAN failed on '%s': %s", path_degs[k], e)
                 continue
 
-            # Save
-            path_restored = os.path.join(out_dir, image_id)
-            try:
-                save_image_jpeg(img_restored, path_restored, quality=95)
-            except Exception as e:
-                logger.error("S4A: Save failed '%s': %s", path_restored, e)
-                continue
-
-            # Manifest row
-            manifest_rows.append(
-                {
-                    "method": "gfpgan",
-                    "id": image_id,
-                    "path_gt": path_gt,
-                    "path_deg": path_deg,
-                    "path_restored": path_restored,
-                    "degradation": preset,
-                    "split": split,
-                    "restored_w": img_restored.width,
-                    "restored_h": img_restored.height,
-                }
+            # Save (fire-and-forget; awaited at the preset boundary)
+            restored_w[k] = img_restored.width
+            restored_h[k] = img_restored.height
+            pending_saves.append(
+                (k, pool.submit(save_image_jpeg, img_restored, path_restoreds[k], 95))
             )
 
             processed_total += 1
             if processed_total % 1000 == 0:
                 logger.info("S4A: Processed %d / %d total samples...", processed_total, total_rows)
 
+        # Drain the save queue; only confirmed writes reach the manifest.
+        for k, sfut in pending_saves:
+            try:
+                sfut.result()
+            except Exception as e:
+                logger.error("S4A: Save failed '%s': %s", path_restoreds[k], e)
+                continue
+            ok[k] = True
+
+        if ok.any():
+            kept = sub.loc[ok, ["id", "path_gt", "path_deg", "split"]].copy()
+            kept.insert(0, "method", "gfpgan")
+            kept["path_restored"] = path_restoreds[ok]
+            kept["degradation"] = preset
+            kept["restored_w"] = restored_w[ok]
+            kept["restored_h"] = restored_h[ok]
+            kept[cols].to_csv(manifest_f, index=False, header=(rows_written == 0))
+            rows_written += len(kept)
+            restored_paths.extend(path_restoreds[ok].tolist())
+
         logger.info(
             "S4A: Finished preset '%s'. Processed in this group: %d.",
             preset,
-            len(rows),
+            n_preset,
         )
 
+    pool.shutdown(wait=True)
+
     # ------------------------------------------------------------------------------
     # Write S4A manifest
     # ------------------------------------------------------------------------------
-    if not manifest_rows:
+    manifest_f.close()
+    if rows_written == 0:
+        os.remove(tmp_manifest)
         logger.error("S4A: No outputs produced; manifest would be empty.")
         raise SystemExit(1)
 
-    cols = [
-        "method",
-        "id",
-        "path_gt",
-        "path_deg",
-        "path_restored",
-        "degradation",
-        "split",
-        "restored_w",
-        "restored_h",
-    ]
-    pd.DataFrame(manifest_rows, columns=cols).to_csv(s4_manifest_path, index=False)
-    logger.info("S4A: Wrote manifest: %s (rows=%d)", s4_manifest_path, len(manifest_rows))
+    os.replace(tmp_manifest, s4_manifest_path)
+    logger.info("S4A: Wrote manifest: %s (rows=%d)", s4_manifest_path, rows_written)
 
     # Sanity: check that all restored files exist
-    restored_paths = [r["path_restored"] for r in manifest_rows]
     exist_n = count_existing(restored_paths)
     if exist_n != len(restored_paths):
         logger.error(
@@ -1,9 +1,15 @@
 import os
 from typing import Iterable
 
+import numpy as np
 import pandas as pd
 from PIL import Image, UnidentifiedImageError
 
+try:
+    import cv2
+except ImportError:  # pragma: no cover - cv2 is in requirements
+    cv2 = None
+
 from src.utils.logging import get_logger
 
 logger = get_logger("S4A_IO")
@@ -44,14 +50,21 @@ def load_image_rgb(path: str) -> Image.Image:
     if size_bytes <= 0:
         raise RuntimeError(f"S4A: Zero-byte input image: {path}")
 
-    try:
-        with Image.open(path) as im:
-            im.load()  # force full decode
-            img = im.convert("RGB")
-    except UnidentifiedImageError as e:
-        raise RuntimeError(f"S4A: Unidentified/unsupported image file: {path}: {e}") from e
-    except Exception as e:
-        raise RuntimeError(f"S4A: Failed to decode image: {path}: {e}") from e
+    if cv2 is not None:
+        # libjpeg-turbo's SIMD decode path, without PIL's Python framing.
+        arr = cv2.imread(path, cv2.IMREAD_COLOR)
+        if arr is None:
+            raise RuntimeError(f"S4A: Failed to decode image: {path}")
+        img = Image.fromarray(cv2.cvtColor(arr, cv2.COLOR_BGR2RGB))
+    else:
+        try:
+            with Image.open(path) as im:
+                im.load()  # force full decode
+                img = im.convert("RGB")
+        except UnidentifiedImageError as e:
+            raise RuntimeError(f"S4A: Unidentified/unsupported image file: {path}: {e}") from e
+        except Exception as e:
+            raise RuntimeError(f"S4A: Failed to decode image: {path}: {e}") from e
 
     w, h = img.size
     if w <= 0 or h <= 0:
@@ -64,7 +77,15 @@ def load_image_rgb(path: str) -> Image.Image:
 
 def save_image_jpeg(img: Image.Image, path: str, quality: int = 95) -> None:
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    img.save(path, format="JPEG", quality=quality, optimize=True)
+    if cv2 is not None:
+        bgr = cv2.cvtColor(np.asarray(img), cv2.COLOR_RGB2BGR)
+        ok, buf = cv2.imencode(".jpg", bgr, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            raise RuntimeError(f"S4A: JPEG encode failed: {path}")
+        with open(path, "wb") as f:
+            f.write(buf.tobytes())
+    else:
+        img.save(path, format="JPEG", quality=quality, optimize=True)
 
 
 def count_existing(paths: Iterable[str]) -> int:
@@ -1,8 +1,13 @@
+import atexit
 import logging
+import logging.handlers
+import multiprocessing
 import os
 from typing import Dict
 
 _LOGGERS: Dict[str, logging.Logger] = {}
+_LISTENER: logging.handlers.QueueListener = None
+_OWNER_PID: int = None
 
 
 def _ensure_log_dir() -> str:
@@ -11,33 +16,64 @@ def _ensure_log_dir() -> str:
     return log_dir
 
 
+def _ensure_root_handlers() -> None:
+    """Attach one shared console + file handler pair to the root logger.
+
+    Named loggers propagate to root, so every logger shares a single
+    file descriptor for pipeline.log instead of one per logger name.
+    Records pass through a multiprocessing.Queue so the os.write happens
+    on a listener thread, off the hot loops — and, unlike a plain
+    queue.SimpleQueue, records emitted inside forked pool workers reach
+    the parent's listener instead of vanishing with the worker.
+    """
+    global _LISTENER, _OWNER_PID
+    if _LISTENER is not None:
+        return
+
+    _ensure_log_dir()
+    formatter = logging.Formatter(
+        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+
+    file_path = os.path.join("results", "logs", "pipeline.log")
+    file_handler = logging.FileHandler(file_path, mode="a", encoding="utf-8")
+    file_handler.setFormatter(formatter)
+
+    log_queue = multiprocessing.Queue(-1)
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    _LISTENER = logging.handlers.QueueListener(
+        log_queue, stream_handler, file_handler, respect_handler_level=False
+    )
+    _LISTENER.start()
+    _OWNER_PID = os.getpid()
+    atexit.register(_stop_listener)
+
+
+def _stop_listener() -> None:
+    # Only the process that started the listener may stop it; a forked
+    # worker exiting must not push the shared sentinel into the queue.
+    if _LISTENER is not None and os.getpid() == _OWNER_PID:
+        _LISTENER.stop()
+
+
 def get_logger(name: str) -> logging.Logger:
-    """Return a logger with console + file handlers attached.
+    """Return a named logger that propagates to the shared root handlers.
 
     All logs go to results/logs/pipeline.log plus stdout.
-    Handlers are attached only once per logger name.
     """
     if name in _LOGGERS:
         return _LOGGERS[name]
 
-    _ensure_log_dir()
+    _ensure_root_handlers()
     logger = logging.getLogger(name)
     logger.setLevel(logging.INFO)
-    logger.propagate = False
-
-    if not logger.handlers:
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        )
-
-        stream_handler = logging.StreamHandler()
-        stream_handler.setFormatter(formatter)
-        logger.addHandler(stream_handler)
-
-        file_path = os.path.join("results", "logs", "pipeline.log")
-        file_handler = logging.FileHandler(file_path, mode="a", encoding="utf-8")
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+    logger.propagate = True
 
     _LOGGERS[name] = logger
     return logger
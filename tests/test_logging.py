@@ -0,0 +1,68 @@
+# tests/test_logging.py
+
+"""
+Fork-safety check for the shared queue logging setup.
+
+The S3/S4 stages log from ProcessPoolExecutor workers, so a record
+emitted inside a forked child must reach results/logs/pipeline.log via
+the parent's queue listener. The scenario runs in a subprocess with its
+own working directory so the module-level listener state stays isolated.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SCRIPT = """
+import multiprocessing
+import sys
+import time
+
+sys.path.insert(0, {root!r})
+from src.utils.logging import get_logger
+
+logger = get_logger("T_FORK")
+
+
+def worker():
+    get_logger("T_FORK").error("from-forked-worker")
+
+
+if __name__ == "__main__":
+    ctx = multiprocessing.get_context("fork")
+    p = ctx.Process(target=worker)
+    p.start()
+    p.join()
+    logger.info("from-parent-after-join")
+    # Give the listener thread a moment to drain the queue.
+    time.sleep(0.5)
+"""
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "fork not available")
+class ForkedWorkerLogging(unittest.TestCase):
+    def test_forked_worker_record_reaches_log_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            proc = subprocess.run(
+                [sys.executable, "-c", _SCRIPT.format(root=_REPO_ROOT)],
+                cwd=tmp,
+                capture_output=True,
+                text=True,
+                timeout=60,
+            )
+            self.assertEqual(proc.returncode, 0, proc.stderr)
+
+            log_path = os.path.join(tmp, "results", "logs", "pipeline.log")
+            self.assertTrue(os.path.isfile(log_path), "pipeline.log not created")
+            with open(log_path, encoding="utf-8") as f:
+                contents = f.read()
+            self.assertIn("from-forked-worker", contents)
+            self.assertIn("from-parent-after-join", contents)
+
+
+if __name__ == "__main__":
+    unittest.main()
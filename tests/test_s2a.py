@@ -0,0 +1,93 @@
+# tests/test_s2a.py
+
+"""
+End-to-end check of the S2A alignment stage on a tiny synthetic dataset.
+
+Runs run_s2a over two random images with valid landmarks and asserts the
+aligned JPEGs, the decoded tensor store and its index all come out with
+the expected shape — so a task-tuple or store-layout change cannot ship
+unexercised.
+"""
+
+import os
+import tempfile
+import unittest
+
+try:
+    import cv2
+    import numpy as np
+    import pandas as pd
+
+    HAVE_DEPS = True
+except ImportError:
+    HAVE_DEPS = False
+
+
+@unittest.skipUnless(HAVE_DEPS, "numpy/cv2/pandas not installed")
+class RunS2AEndToEnd(unittest.TestCase):
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def _write_dataset(self, fnames):
+        from src.s2_align import s2a
+
+        os.makedirs(s2a.RAW_IMG_DIR)
+        rng = np.random.default_rng(0)
+        rows = []
+        for fname in fnames:
+            img = rng.integers(0, 255, size=(218, 178, 3), dtype=np.uint8)
+            self.assertTrue(cv2.imwrite(os.path.join(s2a.RAW_IMG_DIR, fname), img))
+            # Canonical geometry scaled into the raw frame: in-bounds
+            # and non-degenerate for the Umeyama solve.
+            pts = s2a.CANONICAL_5PT * 0.5 + 20.0
+            rows.append([fname] + pts.reshape(-1).tolist())
+        cols = ["image_id"] + [f"p{i}" for i in range(10)]
+        pd.DataFrame(rows, columns=cols).to_csv(s2a.LANDMARK_CSV, index=False)
+
+    def test_aligns_two_images(self):
+        from src.s2_align import s2a
+
+        fnames = ["000001.jpg", "000002.jpg"]
+        self._write_dataset(fnames)
+
+        s2a.run_s2a()
+
+        for fname in fnames:
+            self.assertTrue(
+                os.path.isfile(os.path.join(s2a.OUT_IMG_DIR, fname)),
+                f"missing aligned output for {fname}",
+            )
+
+        index_path = os.path.join(s2a.S2_OUT_ROOT, "aligned_index.txt")
+        with open(index_path, encoding="utf-8") as f:
+            self.assertEqual(f.read().splitlines(), fnames)
+
+        store_path = os.path.join(s2a.S2_OUT_ROOT, "aligned.u8")
+        self.assertEqual(
+            os.path.getsize(store_path),
+            len(fnames) * s2a.TARGET_SIZE * s2a.TARGET_SIZE * 3,
+        )
+
+    def test_zero_images_writes_empty_index_without_store(self):
+        from src.s2_align import s2a
+
+        self._write_dataset([])
+
+        s2a.run_s2a()
+
+        index_path = os.path.join(s2a.S2_OUT_ROOT, "aligned_index.txt")
+        with open(index_path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "")
+        # No rows means no tensor store; mapping a zero-byte file would
+        # raise inside np.memmap.
+        self.assertFalse(os.path.exists(os.path.join(s2a.S2_OUT_ROOT, "aligned.u8")))
+
+
+if __name__ == "__main__":
+    unittest.main()